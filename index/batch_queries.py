@@ -0,0 +1,126 @@
+#-------------------------------------------------------------------------------
+# Name:        Batch query resolution
+# Purpose:     Resolves a large number of queries at once. The queries and the
+#              index are turned into sparse matrices and the relevance value of
+#              every query and document is obtained with a single product.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Index_Reader
+import resolve_queries
+import numpy as np
+import scipy.sparse as sp
+
+# Number of queries multiplied at the same time
+batch_size = 1000
+# Number of texts returned for each query
+k = 10
+
+def document_matrix(index):
+    """
+    Given an index returns a sparse matrix (terms x documents) with the tf-idf
+    value of each term in each document divided by the norm of the document
+    """
+    indptr = np.zeros(len(index) + 1, dtype=np.int64)
+    np.cumsum(np.asarray(index.dfs, dtype=np.int64), out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    data = np.empty(indptr[-1], dtype=np.float64)
+
+    for position in range(len(index)):
+        postings = index.postings(position)
+        start = indptr[position]
+        for block in range(postings.block_count()):
+            doc_ids, weights = postings.block(block)
+            end = start + len(doc_ids)
+            indices[start:end] = doc_ids
+            data[start:end] = np.asarray(weights, dtype=np.float64) * postings.unit
+            start = end
+
+    norms = np.asarray(index.norms, dtype=np.float64)
+    data /= norms[indices]
+    return sp.csr_matrix((data, indices, indptr),
+        shape=(len(index), index.documents()))
+
+def query_matrix(index, tfs):
+    """
+    Given the weights of the terms of each query returns a sparse matrix
+    (queries x terms) with the normalized A vector of each query
+    """
+    indptr = [0]
+    indices = []
+    data = []
+    for query in tfs:
+        row = {}
+        for term in tfs[query]:
+            position = index.find(term)
+            if position != -1:
+                row[position] = index.idfs[position] * tfs[query][term]
+        norm = np.sqrt(sum(value * value for value in row.values()))
+        for position in sorted(row):
+            indices.append(position)
+            data.append(row[position] / norm)
+        indptr.append(len(indices))
+
+    return sp.csr_matrix((np.asarray(data, dtype=np.float64),
+        np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(tfs), len(index)))
+
+def top_k(scores, k):
+    """
+    Given a sparse matrix with the values of each query (row) and document,
+    returns for each row the k best documents with their value
+    """
+    results = []
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        values = scores.data[start:end]
+        documents = scores.indices[start:end]
+        if len(values) > k:
+            best = np.argpartition(-values, k - 1)[:k]
+            values = values[best]
+            documents = documents[best]
+        # Highest value first, lowest document first on ties
+        order = np.lexsort((documents, -values))
+        results.append(list(zip(documents[order].tolist(), values[order].tolist())))
+    return results
+
+def resolve_batch(index, matrix, tfs, k):
+    """
+    Given the weights of the terms of several queries, returns for each query
+    the k texts with the highest relevance value
+    """
+    names = list(tfs)
+    results = {}
+    for start in range(0, len(names), batch_size):
+        batch = {}
+        for name in names[start:start + batch_size]:
+            batch[name] = tfs[name]
+        scores = (query_matrix(index, batch) @ matrix).tocsr()
+        for name, best in zip(batch, top_k(scores, k)):
+            results[name] = [(index.doc_names[doc], value) for doc, value in best]
+    return results
+
+def main():
+    """
+    Resolves the queries from a .txt file and saves the results in a .txt file
+    """
+    index = Index_Reader("index.bin")
+    matrix = document_matrix(index)
+
+    resolve_queries.load_queries("cran-queries.txt")
+    resolve_queries.load_store()
+    tfs = resolve_queries.weighting_tf(resolve_queries.queries)
+    results = resolve_batch(index, matrix, tfs, k)
+
+    with open("result.txt", 'w') as file:
+        for query in results:
+            file.writelines("Query" + query + "\n")
+            for name, value in results[query]:
+                file.writelines(resolve_queries.store.text(name)[0:280] + "\n\n")
+            file.writelines("\n")
+
+if __name__ == '__main__':
+    main()
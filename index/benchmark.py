@@ -0,0 +1,280 @@
+#-------------------------------------------------------------------------------
+# Name:        Benchmark of the retrieval
+# Purpose:     Builds the index of a collection and resolves the Cranfield
+#              queries with each way of ranking the texts. The quality of the
+#              results (MAP, P@10, nDCG@10 against cranqrel) is reported next to
+#              the cost (build time, index size, peak memory, queries per second
+#              and latency percentiles), so a change can be checked on both. The
+#              collection can be scaled up with synthetic texts.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+from multiprocessing import Process
+from itertools import accumulate
+import resolve_queries
+import create_index
+import spimi_index
+import json
+import math
+import os
+import random
+import resource
+import time
+
+# Collection, queries and relevance judgments
+texts_file = "cran-1400.txt"
+queries_file = "cran-queries.txt"
+qrels_file = "../similarity-between-texts/cranqrel"
+# Index built for the benchmark
+index_file = "benchmark.bin"
+# Times the collection is scaled up with synthetic texts (1 uses only the
+# original texts)
+scale = 1
+# Seed of the synthetic texts, so every run gets the same collection
+seed = 1
+# Builder of the index: "create_index" (in memory) or "spimi" (external memory)
+builder = "create_index"
+# Ways of ranking the texts as (scoring, retrieval) of resolve_queries
+backends = [("cosine", "top_k"), ("cosine", "exhaustive"),
+    ("bm25", "top_k"), ("bm25", "exhaustive")]
+# Number of texts returned for each query to measure the latency
+k = 10
+# Number of texts returned for each query to calculate MAP
+depth = 100
+# File where the report is saved and report of a previous run to compare with
+report_file = "benchmark.json"
+baseline_file = None
+
+def generate_corpus(filename, output, scale, seed):
+    """
+    Given a .txt file with texts, writes a new one with the original texts
+    followed by synthetic ones until it has scale times as many texts. Each
+    synthetic text takes the length of a random original text and words drawn
+    with the frequency they have in the collection. The original texts keep
+    their identifiers, so cranqrel is still valid and the new ones, numbered
+    after the highest one, are noise
+    """
+    generator = random.Random(seed)
+    counters = {}
+    lengths = []
+    last = 0
+    with open(filename, 'r') as file:
+        for line in file:
+            last = max(last, text_number(line.split()[0]))
+            words = line.split('\t', 1)[-1].split()
+            lengths.append(len(words))
+            for word in words:
+                counters[word] = counters.get(word, 0) + 1
+
+    words = list(counters)
+    weights = list(accumulate(counters[word] for word in words))
+    with open(filename, 'r') as file, open(output, 'w') as result:
+        for line in file:
+            result.write(line.rstrip() + "\n")
+        for number in range(last + 1, last + (scale - 1) * len(lengths) + 1):
+            text = generator.choices(words, cum_weights=weights,
+                k=generator.choice(lengths))
+            result.write("I" + str(number) + " \t" + " ".join(text) + "\n")
+
+def load_qrels(filename):
+    """
+    Loads the relevance judgments. Returns for each query number a dictionary
+    with the number of each relevant text and its grade (1 is the highest, -1
+    is not relevant)
+    """
+    qrels = {}
+    with open(filename, 'r') as file:
+        for line in file:
+            fields = line.split()
+            if len(fields) < 3:
+                continue
+            query, text, grade = int(fields[0]), int(fields[1]), int(fields[2])
+            if grade > 0:
+                if qrels.get(query) == None:
+                    qrels[query] = {}
+                qrels[query][text] = grade
+    return qrels
+
+def gain(grade):
+    """
+    Given the grade of a relevant text returns its gain for nDCG. Grade 1 gives
+    the highest gain
+    """
+    return 5 - grade
+
+def average_precision(ranking, relevant):
+    """
+    Given the numbers of the returned texts and the relevant ones, returns the
+    average of the precision at each relevant text found
+    """
+    found = 0
+    total = 0
+    for position, text in enumerate(ranking):
+        if relevant.get(text) != None:
+            found += 1
+            total += found / (position + 1)
+    return total / len(relevant) if len(relevant) > 0 else 0
+
+def precision(ranking, relevant, n):
+    """
+    Returns the fraction of relevant texts among the first n returned
+    """
+    return sum(1 for text in ranking[0:n] if relevant.get(text) != None) / n
+
+def ndcg(ranking, relevant, n):
+    """
+    Returns the discounted cumulative gain of the first n returned texts divided
+    by the one of the best possible ranking
+    """
+    dcg = 0
+    for position, text in enumerate(ranking[0:n]):
+        if relevant.get(text) != None:
+            dcg += gain(relevant[text]) / math.log2(position + 2)
+    ideal = sorted((gain(grade) for grade in relevant.values()), reverse=True)
+    best = 0
+    for position, value in enumerate(ideal[0:n]):
+        best += value / math.log2(position + 2)
+    return dcg / best if best > 0 else 0
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of a sorted list (nearest rank)
+    """
+    if len(values) == 0:
+        return None
+    return values[math.ceil(p / 100 * len(values)) - 1]
+
+def text_number(name):
+    """
+    Given the identifier of a text (I<number>) returns its number
+    """
+    return int(name.strip()[1:])
+
+def build(corpus, filename):
+    """
+    Builds the index of a collection with the selected builder
+    """
+    if builder == "spimi":
+        spimi_index.build_index(spimi_index.read_texts(corpus), filename)
+    elif builder == "create_index":
+        texts = create_index.load_lines(corpus)
+        if create_index.processes > 1:
+            create_index.create_index_parallel(texts, create_index.processes, filename)
+        else:
+            create_index.create_index(create_index.weighting_tf(texts), filename)
+    else:
+        raise Exception("Invalid builder")
+
+def benchmark_build(corpus, filename):
+    """
+    Builds the index in a child process, so its peak memory is measured apart
+    from the queries. Returns the build time, the index size and the peak
+    memory in MB
+    """
+    start = time.perf_counter()
+    process = Process(target=build, args=(corpus, filename))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise Exception("The index could not be built")
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is given in KB
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {"seconds": elapsed, "size_mb": os.path.getsize(filename) / 1024 / 1024,
+        "peak_rss_mb": peak}
+
+def benchmark_backend(tfs, qrels, scoring, retrieval):
+    """
+    Resolves every query with a way of ranking the texts. Returns the quality
+    of the results and the latencies
+    """
+    resolve_queries.retrieval = retrieval
+    names = list(tfs)
+
+    latencies = []
+    start = time.perf_counter()
+    for name in names:
+        begin = time.perf_counter()
+        resolve_queries.resolve(tfs[name], k, scoring)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    # The queries of cranqrel are numbered by their order in the file
+    total_ap = total_p10 = total_ndcg = 0
+    judged = 0
+    for number, name in enumerate(names, 1):
+        relevant = qrels.get(number)
+        if relevant == None:
+            continue
+        ranking = [text_number(text) for text, value in
+            resolve_queries.resolve(tfs[name], depth, scoring)]
+        total_ap += average_precision(ranking, relevant)
+        total_p10 += precision(ranking, relevant, 10)
+        total_ndcg += ndcg(ranking, relevant, 10)
+        judged += 1
+
+    result = {"map": total_ap / judged, "p@10": total_p10 / judged,
+        "ndcg@10": total_ndcg / judged, "qps": len(names) / elapsed}
+    for p in (50, 95, 99):
+        result["p" + str(p) + "_ms"] = percentile(latencies, p) * 1000
+    return result
+
+def compare(report, baseline):
+    """
+    Prints the change of each metric with respect to a previous report
+    """
+    pairs = [("build", report["build"], baseline.get("build", {}))]
+    for backend in report["backends"]:
+        pairs.append((backend, report["backends"][backend],
+            baseline.get("backends", {}).get(backend, {})))
+    for name, current, previous in pairs:
+        for metric in current:
+            if previous.get(metric):
+                change = (current[metric] - previous[metric]) / previous[metric] * 100
+                print("{0:<20} {1:<12} {2:>12.4f} -> {3:>12.4f} ({4:+.1f}%)".format(
+                    name, metric, previous[metric], current[metric], change))
+
+def main():
+    """
+    Runs the benchmark and saves the report in a .json file
+    """
+    corpus = texts_file
+    if scale > 1:
+        corpus = "cran-synthetic-" + str(scale) + ".txt"
+        if not os.path.exists(corpus):
+            generate_corpus(texts_file, corpus, scale, seed)
+
+    report = {"corpus": corpus, "builder": builder,
+        "build": benchmark_build(corpus, index_file), "backends": {}}
+
+    resolve_queries.index = resolve_queries.Index_Reader(index_file)
+    resolve_queries.load_queries(queries_file)
+    tfs = resolve_queries.weighting_tf(resolve_queries.queries)
+    qrels = load_qrels(qrels_file)
+    for scoring, retrieval in backends:
+        report["backends"][scoring + "/" + retrieval] = benchmark_backend(tfs,
+            qrels, scoring, retrieval)
+    report["query_peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print("Corpus: " + corpus + " (" + builder + ")")
+    print("Build: {seconds:.2f} s, {size_mb:.2f} MB, peak RSS {peak_rss_mb:.1f} MB".format(
+        **report["build"]))
+    print("Queries: peak RSS {0:.1f} MB".format(report["query_peak_rss_mb"]))
+    print("{0:<20} {1:>7} {2:>7} {3:>8} {4:>8} {5:>8} {6:>8} {7:>8}".format(
+        "backend", "MAP", "P@10", "nDCG@10", "QPS", "p50 ms", "p95 ms", "p99 ms"))
+    for backend, result in report["backends"].items():
+        print("{0:<20} {map:>7.4f} {p@10:>7.4f} {ndcg@10:>8.4f} {qps:>8.1f} "
+            "{p50_ms:>8.2f} {p95_ms:>8.2f} {p99_ms:>8.2f}".format(backend, **result))
+
+    if baseline_file != None:
+        with open(baseline_file, 'r') as file:
+            compare(report, json.load(file))
+    with open(report_file, 'w') as file:
+        json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()
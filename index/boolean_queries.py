@@ -0,0 +1,265 @@
+#-------------------------------------------------------------------------------
+# Name:        Boolean queries
+# Purpose:     Resolves queries with the AND, OR and NOT operators, parentheses
+#              and required (+word) or excluded (-word) words. The set of texts
+#              is narrowed with the postings before ranking the survivors.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+import resolve_queries
+import bisect
+import heapq
+import sys
+
+# Kinds of clause of a query
+MUST = "+"
+SHOULD = ""
+MUST_NOT = "-"
+
+class Boolean_Query:
+    """
+    Data structure to store a query as a list of clauses. Each clause is a
+    kind (MUST, SHOULD or MUST_NOT) and a list of stemmed words or a
+    Boolean_Query
+    """
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+    def __str__(self):
+        result = []
+        for kind, item in self.clauses:
+            if isinstance(item, Boolean_Query):
+                result.append(kind + "(" + str(item) + ")")
+            else:
+                result.append(kind + " ".join(item))
+        return " ".join(result)
+
+def tokenize(text):
+    """
+    Given a query returns its words, operators and parentheses
+    """
+    return text.replace("(", " ( ").replace(")", " ) ").split()
+
+def parse_query(text):
+    """
+    Given a query returns its Boolean_Query
+    """
+    tokens = tokenize(text)
+    query, position = parse_clauses(tokens, 0)
+    if position < len(tokens):
+        raise Exception("Unexpected " + tokens[position])
+    return query
+
+def parse_clauses(tokens, position):
+    """
+    Reads clauses until the end of the query or a closing parenthesis. Words
+    joined by AND are required, joined by OR are optional and after NOT are
+    excluded. Words without operators are optional
+    """
+    clauses = []
+    conjunction = None
+    while position < len(tokens) and tokens[position] != ")":
+        token = tokens[position]
+        if token in ("AND", "OR"):
+            conjunction = token
+            position += 1
+            continue
+
+        kind = SHOULD
+        if token == "NOT":
+            kind = MUST_NOT
+            position += 1
+            token = tokens[position] if position < len(tokens) else ""
+        elif token[0] in (MUST, MUST_NOT):
+            kind = token[0]
+            token = token[1:]
+            if token == "":
+                # The sign is separated from its word or parenthesis
+                position += 1
+                token = tokens[position] if position < len(tokens) else ""
+
+        if token == "(":
+            item, position = parse_clauses(tokens, position + 1)
+            if position >= len(tokens):
+                raise Exception("Missing )")
+        elif token == "":
+            raise Exception("Missing word at the end of the query")
+        else:
+            item = resolve_queries.stem_tokens(token)
+        position += 1
+
+        if conjunction == "AND":
+            # Both sides of AND are required
+            if clauses and clauses[-1][0] == SHOULD:
+                clauses[-1] = (MUST, clauses[-1][1])
+            if kind == SHOULD:
+                kind = MUST
+        conjunction = None
+        if isinstance(item, Boolean_Query) or len(item) > 0:
+            clauses.append((kind, item))
+
+    return Boolean_Query(clauses), position
+
+def gallop(ids, target, low):
+    """
+    Returns the first position from low of a sorted sequence whose value is not
+    lower than target. The distance to it is doubled until it is passed and
+    then it is searched in the last interval
+    """
+    step = 1
+    high = low
+    while high < len(ids) and ids[high] < target:
+        low = high + 1
+        high += step
+        step *= 2
+    return bisect.bisect_left(ids, target, low, min(high, len(ids)))
+
+def intersect(lists):
+    """
+    Given several sorted sequences of documents returns the documents in all of
+    them. The shortest is walked and the rest are searched by galloping
+    """
+    lists = sorted(lists, key=len)
+    result = list(lists[0])
+    for ids in lists[1:]:
+        common = []
+        position = 0
+        for document in result:
+            position = gallop(ids, document, position)
+            if position == len(ids):
+                break
+            if ids[position] == document:
+                common.append(document)
+        result = common
+        if len(result) == 0:
+            break
+    return result
+
+def subtract(ids, excluded):
+    """
+    Given two sorted sequences of documents returns those of the first one that
+    are not in the second one
+    """
+    result = []
+    position = 0
+    for document in ids:
+        position = gallop(excluded, document, position)
+        if position == len(excluded) or excluded[position] != document:
+            result.append(document)
+    return result
+
+def documents(item):
+    """
+    Returns the sorted ids of the documents that match a clause. The words
+    that appear in every document have no postings and match all of them
+    """
+    if isinstance(item, Boolean_Query):
+        return evaluate(item)
+    index = resolve_queries.index
+    lists = []
+    for term in item:
+        postings = index.get(term)
+        if postings == None:
+            if index.is_common(term):
+                continue
+            return []
+        lists.append(postings.doc_ids)
+    if len(lists) == 0:
+        return range(index.documents())
+    return intersect(lists)
+
+def evaluate(query):
+    """
+    Returns the sorted ids of the documents that match a query. Required
+    clauses are intersected shortest first, optional clauses are only needed
+    when there are no required ones and excluded clauses are removed at the end
+    """
+    required = [documents(item) for kind, item in query.clauses if kind == MUST]
+    if len(required) > 0:
+        result = intersect(required)
+    else:
+        optional = set()
+        for kind, item in query.clauses:
+            if kind == SHOULD:
+                optional.update(documents(item))
+        result = sorted(optional)
+        if len(result) == 0 and len(query.clauses) > 0 and \
+                all(kind == MUST_NOT for kind, item in query.clauses):
+            result = range(resolve_queries.index.documents())
+
+    for kind, item in query.clauses:
+        if kind == MUST_NOT and len(result) > 0:
+            result = subtract(result, documents(item))
+    return list(result)
+
+def scoring_terms(query, counters):
+    """
+    Counts the words of the query that are not excluded, used to rank the texts
+    """
+    for kind, item in query.clauses:
+        if kind == MUST_NOT:
+            continue
+        if isinstance(item, Boolean_Query):
+            scoring_terms(item, counters)
+        else:
+            for term in item:
+                counters[term] = counters.get(term, 0) + 1
+    return counters
+
+def resolve_boolean(text, k):
+    """
+    Given a boolean query, returns the k texts that match it with the highest
+    relevance value. Only the texts that match are ranked
+    """
+    index = resolve_queries.index
+    query = parse_query(text)
+    matches = evaluate(query)
+
+    counters = scoring_terms(query, {})
+    terms = resolve_queries.relative_frequency({"query": counters})["query"]
+    postings = resolve_queries.get_postings(terms)
+    a, a2 = resolve_queries.calculate_a(postings, terms)
+
+    nums = {}
+    for term in postings:
+        position = 0
+        for document in matches:
+            position = postings[term].seek(document, position)
+            if position == len(postings[term]):
+                break
+            if postings[term].doc_ids[position] == document:
+                nums[document] = nums.get(document, 0) + \
+                    a[term] * postings[term].tf_idfs[position]
+
+    values = []
+    for document in matches:
+        if nums.get(document) != None:
+            value = resolve_queries.calculate_value(a2, index.norms[document], nums[document])
+        else:
+            value = 0
+        values.append((value, -document))
+
+    results = []
+    for value, document in heapq.nlargest(k, values):
+        results.append((index.doc_names[-document], value))
+    return results
+
+def main():
+    """
+    Resolves the boolean queries read from the standard input
+    """
+    resolve_queries.load_index()
+    resolve_queries.load_store()
+    for line in sys.stdin:
+        if line.strip() == "":
+            continue
+        print("Query: " + str(parse_query(line)))
+        for name, value in resolve_boolean(line, resolve_queries.k):
+            print("\t" + "{0:.4f}".format(value) + " " + name + " " +
+                resolve_queries.store.text(name)[0:100])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#-------------------------------------------------------------------------------
+# Name:        Document store
+# Purpose:     Keeps the texts of the collection in a binary file with a table
+#              of fixed-width offsets, so the text of a document or a snippet
+#              with the words of a query can be read through mmap without
+#              loading the collection in memory.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Sections_Writer, Sections_Reader, String_Table, add_strings
+from array import array
+from textblob import Word
+import bisect
+import re
+
+# Identifies the files written by Store_Writer
+MAGIC = b"WISDOC01"
+# Number of characters of a snippet
+snippet_width = 280
+# Marks placed around the words of the query in a snippet
+marks = ("<b>", "</b>")
+
+class Store_Writer(Sections_Writer):
+    """
+    Writes a document store. The texts are written as they are added, so only
+    their names and offsets are kept in memory
+    """
+    def __init__(self, filename):
+        super().__init__(filename, MAGIC)
+        self.names = []                    # Names of the documents by id
+        self.start = self.file.tell()      # Offset of the first text
+        self.offsets = array("Q", [0])     # Offset of each text from the first
+
+    def add(self, name, text):
+        """
+        Writes the text of the next document
+        """
+        self.names.append(name)
+        self.file.write(text.encode("utf-8"))
+        self.offsets.append(self.file.tell() - self.start)
+
+    def close(self):
+        """
+        Writes the offsets and the names and closes the file
+        """
+        self.sections["texts"] = [self.start, self.offsets[-1]]
+        self.add_section("texts_offsets", self.offsets)
+        add_strings(self, "names", self.names)
+        # Ids sorted by name, to find a document by its name
+        order = sorted(range(len(self.names)), key=lambda i: self.names[i])
+        self.add_section("names_order", array("I", order))
+        self.meta["documents"] = len(self.names)
+        super().close()
+
+class Document_Store(Sections_Reader):
+    """
+    Gives access to the texts of a document store without loading them
+    """
+    def __init__(self, filename):
+        super().__init__(filename, MAGIC)
+        self.texts = self.section("texts")
+        self.offsets = self.section("texts_offsets", "Q")
+        self.names = String_Table(self.section("names"),
+            self.section("names_offsets", "Q"))
+        self.order = self.section("names_order", "I")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get(self, doc_id):
+        """
+        Returns the text of a document
+        """
+        if doc_id < 0 or doc_id >= len(self):
+            raise IndexError(doc_id)
+        return str(self.texts[self.offsets[doc_id]:self.offsets[doc_id + 1]], "utf-8")
+
+    def find(self, name):
+        """
+        Returns the id of the document with a name or -1
+        """
+        position = bisect.bisect_left(self.order, name, key=lambda i: self.names[i])
+        if position < len(self.order) and self.names[self.order[position]] == name:
+            return self.order[position]
+        return -1
+
+    def text(self, name):
+        """
+        Returns the text of the document with a name
+        """
+        doc_id = self.find(name)
+        if doc_id == -1:
+            raise KeyError(name)
+        return self.get(doc_id)
+
+    def snippet(self, doc_id, terms, width=None):
+        """
+        Given the stemmed words of a query, returns the part of a text of width
+        characters with the most different words of the query, with those words
+        between marks
+        """
+        if width == None:
+            width = snippet_width
+        text = self.get(doc_id)
+        words = []
+        for match in re.finditer(r"\w+", text):
+            stem = Word(match.group().lower()).stem()
+            words.append((match.start(), match.end(), stem if stem in terms else None))
+
+        # Window of words that fit in the width with the most different terms,
+        # the first one on ties
+        best = (-1, 0, 0)
+        counts = {}
+        right = 0
+        for left in range(len(words)):
+            right = max(right, left)
+            while right < len(words) and words[right][1] - words[left][0] <= width:
+                if words[right][2] != None:
+                    counts[words[right][2]] = counts.get(words[right][2], 0) + 1
+                right += 1
+            if len(counts) > best[0]:
+                best = (len(counts), left, right)
+            if words[left][2] != None and left < right:
+                counts[words[left][2]] -= 1
+                if counts[words[left][2]] == 0:
+                    del counts[words[left][2]]
+        if best[0] <= 0:
+            return text[0:width]
+
+        left, right = best[1], best[2]
+        start = words[left][0] if left > 0 else 0
+        end = words[right - 1][1] if right < len(words) else len(text)
+        result = "..." if start > 0 else ""
+        position = start
+        for word_start, word_end, stem in words[left:right]:
+            if stem != None:
+                result += text[position:word_start] + marks[0] + \
+                    text[word_start:word_end] + marks[1]
+                position = word_end
+        result += text[position:end]
+        return result + ("..." if end < len(text) else "")
+
+    def close(self):
+        """
+        Releases the mapped file
+        """
+        self.texts = self.offsets = self.names = self.order = None
+        super().close()
+
+def build_store(filename, output):
+    """
+    Given a .txt file with a text in each line, saves its texts in a document
+    store in the same order, without loading the whole file
+    """
+    writer = Store_Writer(output)
+    with open(filename, 'r') as file:
+        for line in file:
+            line = line.rstrip()
+            if line == "":
+                continue
+            separator = line.split('\t')
+            writer.add(separator[0].rstrip(), separator[1] if len(separator) > 1 else "")
+    writer.close()
+
+def main():
+    """
+    Creates the document store of a .txt file
+    """
+    build_store("cran-1400.txt", "documents.bin")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,738 @@
+#-------------------------------------------------------------------------------
+# Name:        Binary index file
+# Purpose:     Compact on-disk representation of the index. Terms are kept in a
+#              sorted dictionary, documents are referenced by integer ids and
+#              the postings of each term are stored as contiguous arrays, so the
+#              file can be opened with mmap and read lazily.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from array import array
+from itertools import accumulate
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+
+# Identifies the files written by Index_Writer
+MAGIC = b"WISIDX01"
+# Footer: offset and length of the table of contents followed by the magic
+FOOTER = struct.Struct("<QQ8s")
+# Type of the gaps between documents of a block by their width in bytes
+GAP_TYPES = {1: "B", 2: "H", 4: "I"}
+# Highest quantized weight
+LEVELS = 65535
+# Parameters of BM25 used for the impacts: saturation of the frequency of a word
+# (K1) and normalization by the length of the text (B)
+K1 = 1.2
+B = 0.75
+
+class Sections_Writer:
+    """
+    Writes a binary file made of named sections followed by a table of contents
+    and a footer. The file is written aside and replaces the old one when it is
+    closed, so readers that have the old one mapped are not affected
+    """
+    def __init__(self, filename, magic):
+        self.filename = filename
+        self.magic = magic
+        self.file = open(filename + ".tmp", "w+b")
+        self.file.write(magic)
+        self.sections = {}                 # Sections of the file
+        self.meta = {}                     # Properties saved with the sections
+
+    def add_section(self, name, data):
+        """
+        Writes a named block of bytes (or an array) in the file
+        """
+        self.align()
+        offset = self.file.tell()
+        if isinstance(data, array):
+            data.tofile(self.file)
+        else:
+            self.file.write(data)
+        self.sections[name] = [offset, self.file.tell() - offset]
+
+    def align(self):
+        """
+        Pads the file so that the next write starts at a multiple of 8
+        """
+        padding = -self.file.tell() % 8
+        if padding:
+            self.file.write(b"\0" * padding)
+
+    def close(self):
+        """
+        Writes the table of contents and replaces the old file
+        """
+        toc = json.dumps({"meta": self.meta, "sections": self.sections})
+        toc = toc.encode("utf-8")
+        offset = self.file.tell()
+        self.file.write(toc)
+        self.file.write(FOOTER.pack(offset, len(toc), self.magic))
+        self.file.close()
+        os.replace(self.filename + ".tmp", self.filename)
+
+class Index_Writer(Sections_Writer):
+    """
+    Writes a binary index. Postings must be added in sorted term order, which
+    allows the file to be written in a single pass. With the "raw" codec the
+    postings are plain arrays, with the "block" codec they are compressed in
+    blocks of block_size documents. If the length of each document is given,
+    the BM25 impacts of the terms are saved too. average_length is the one of
+    the whole collection when the documents are a part of it
+    """
+    def __init__(self, filename, doc_names, codec="raw", block_size=128,
+            doc_lengths=None, average_length=None):
+        super().__init__(filename, MAGIC)
+        self.doc_names = list(doc_names)   # Names of the documents by id
+        self.terms = []                    # Terms in sorted order
+        self.idfs = array("d")             # idf value of each term
+        self.offsets = array("Q")          # Offset of the postings of each term
+        self.dfs = array("I")              # Number of documents of each term
+        self.positions = array("Q")        # Offset of the positions of each term
+        self.impacts = array("Q")          # Offset of the impacts of each term
+        # Terms of every document, left out because their idf is 0
+        self.common_terms = []
+        # Sum of the squared tf-idf values of each document
+        self.norms = array("d", [0.0]) * len(self.doc_names)
+        self.meta = {"documents": len(self.doc_names), "codec": codec,
+            "block_size": block_size}
+        self.lengths = None                # Number of words of each document
+        if doc_lengths != None:
+            self.lengths = array("I", doc_lengths)
+            if average_length == None:
+                average_length = sum(self.lengths) / max(1, len(self.lengths))
+            self.meta["average_length"] = average_length
+            self.meta["bm25"] = {"k1": K1, "b": B}
+
+    def add_term(self, term, idf, doc_ids, tfs, positions=None, counts=None,
+            max_tf=None):
+        """
+        Writes the postings of a term. doc_ids must be sorted in ascending order.
+        positions is an optional list with the positions of the term in each
+        document and counts the number of times it appears in each document,
+        needed for the BM25 impacts. max_tf is the highest tf of the term in
+        the whole collection when the documents are a part of it
+        """
+        if self.terms and term <= self.terms[-1]:
+            raise ValueError("Terms must be added in sorted order: " + term)
+        self.align()
+        self.terms.append(term)
+        self.idfs.append(idf)
+        self.offsets.append(self.file.tell())
+        self.dfs.append(len(doc_ids))
+        if self.meta["codec"] == "raw":
+            # The arrays of 8 bytes go first so that all of them stay aligned
+            array("d", tfs).tofile(self.file)
+            array("d", [tf * idf for tf in tfs]).tofile(self.file)
+            array("I", doc_ids).tofile(self.file)
+        elif self.meta["codec"] == "block":
+            data, tfs = encode_blocks(doc_ids, tfs, self.meta["block_size"], max_tf)
+            self.file.write(data)
+        else:
+            raise Exception("Invalid codec")
+
+        # The norms use the same values that the reader will decode
+        for doc_id, tf in zip(doc_ids, tfs):
+            self.norms[doc_id] += math.pow(tf * idf, 2)
+
+        if positions == None:
+            self.positions.append(0)
+        else:
+            self.align()
+            self.positions.append(self.file.tell())
+            self.file.write(encode_positions(positions))
+
+        if counts == None or self.lengths == None:
+            self.impacts.append(0)
+        else:
+            self.align()
+            self.impacts.append(self.file.tell())
+            self.file.write(encode_impacts(doc_ids, counts, self.lengths,
+                self.meta["average_length"]))
+
+    def add_common_term(self, term):
+        """
+        Records a term that appears in every document. It has no postings, but
+        a query that requires it must match all the documents
+        """
+        self.common_terms.append(term)
+
+    def max_scores(self):
+        """
+        Reads back the postings of each term to calculate the highest value of
+        tf-idf / norm among its documents. It is an upper bound of the share of
+        the term in the cosine of any document
+        """
+        end = self.file.tell()
+        result = array("d")
+        for position in range(len(self.terms)):
+            offset = self.offsets[position]
+            if position + 1 < len(self.terms):
+                length = self.offsets[position + 1] - offset
+            else:
+                length = end - offset
+            self.file.seek(offset)
+            postings = read_postings(self.meta, memoryview(self.file.read(length)), 0,
+                self.dfs[position], self.idfs[position], 0)
+            best = 0
+            for doc_id, tf_idf in zip(postings.doc_ids, postings.tf_idfs):
+                if self.norms[doc_id] > 0:
+                    best = max(best, tf_idf / self.norms[doc_id])
+            result.append(best)
+        self.file.seek(end)
+        return result
+
+    def close(self):
+        """
+        Writes the dictionaries and the table of contents and closes the file
+        """
+        self.meta["terms"] = len(self.terms)
+        add_strings(self, "doc_names", self.doc_names)
+        add_strings(self, "terms", self.terms)
+        add_strings(self, "common_terms", sorted(self.common_terms))
+        self.add_section("term_idf", self.idfs)
+        self.add_section("term_offset", self.offsets)
+        self.add_section("term_df", self.dfs)
+        self.add_section("term_positions", self.positions)
+        if self.lengths != None:
+            self.add_section("term_impacts", self.impacts)
+            self.add_section("doc_length", self.lengths)
+        # Norm of the tf-idf vector of each document over the whole vocabulary
+        self.norms = array("d", [math.sqrt(x) for x in self.norms])
+        self.add_section("doc_norm", self.norms)
+        self.add_section("term_max_score", self.max_scores())
+        super().close()
+
+def encode_blocks(doc_ids, tfs, block_size, max_tf=None):
+    """
+    Compresses the postings of a term. The ids are stored as gaps between
+    consecutive documents using 1, 2 or 4 bytes per gap depending on the block,
+    and each tf is quantized to 16 bits relative to the highest tf of the term
+    (max_tf if it is given). Returns the encoded bytes and the tf values that
+    will be decoded
+    """
+    df = len(doc_ids)
+    if max_tf == None:
+        max_tf = max(tfs) if df > 0 else 0
+    scale = max_tf / LEVELS
+
+    last_docs = array("I")      # Last document of each block (skip pointers)
+    offsets = array("I", [0])   # Offset of each block in the data
+    widths = array("B")         # Bytes per gap of each block
+    data = bytearray()
+    decoded = []
+    previous = 0
+    for start in range(0, df, block_size):
+        ids = doc_ids[start:start + block_size]
+        gaps = [ids[0] - previous] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+        for width in sorted(GAP_TYPES):
+            if max(gaps) < 1 << (8 * width):
+                break
+        quantized = array("H")
+        for tf in tfs[start:start + block_size]:
+            quantized.append(round(tf / max_tf * LEVELS) if max_tf > 0 else 0)
+            decoded.append(quantized[-1] * scale)
+        data += array(GAP_TYPES[width], gaps).tobytes() + quantized.tobytes()
+        widths.append(width)
+        offsets.append(len(data))
+        last_docs.append(ids[-1])
+        previous = ids[-1]
+
+    header = array("d", [max_tf]).tobytes() + last_docs.tobytes() + offsets.tobytes()
+    header += widths.tobytes()
+    header += b"\0" * (-len(header) % 8)
+    return header + bytes(data), decoded
+
+def encode_varints(values, data):
+    """
+    Appends a list of non negative integers to a bytearray using 7 bits of each
+    byte, with the highest bit set on every byte but the last of a number
+    """
+    for value in values:
+        while value >= 0x80:
+            data.append((value & 0x7F) | 0x80)
+            value >>= 7
+        data.append(value)
+
+def decode_varints(data, start, end):
+    """
+    Returns the integers encoded between two offsets of a buffer
+    """
+    values = []
+    value = 0
+    shift = 0
+    for byte in data[start:end]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    return values
+
+def encode_positions(positions):
+    """
+    Compresses the positions of a term in each of its documents. There is an
+    offset for each document followed by the gaps between consecutive positions
+    as variable byte integers
+    """
+    data = bytearray()
+    offsets = array("I", [0])
+    for places in positions:
+        encode_varints([places[0]] + [places[i] - places[i - 1]
+            for i in range(1, len(places))], data)
+        offsets.append(len(data))
+    return offsets.tobytes() + bytes(data)
+
+def encode_impacts(doc_ids, counts, lengths, average):
+    """
+    Calculates the BM25 impact (the share of the term in the value of a
+    document, without the idf) of a term in each of its documents. They are
+    saved in decreasing order of impact with their documents, followed by the
+    impacts in the order of the postings
+    """
+    impacts = array("f")
+    for doc_id, count in zip(doc_ids, counts):
+        impacts.append(count * (K1 + 1) /
+            (count + K1 * (1 - B + B * lengths[doc_id] / average)))
+    # The stored values are used for the order, so ties are broken by document
+    order = sorted(range(len(doc_ids)), key=lambda i: (-impacts[i], doc_ids[i]))
+    return array("f", [impacts[i] for i in order]).tobytes() + \
+        array("I", [doc_ids[i] for i in order]).tobytes() + impacts.tobytes()
+
+class Impacts:
+    """
+    BM25 impacts of a term. The documents can be read in decreasing order of
+    impact or the impact of the i-th document of the postings can be looked up
+    """
+    def __init__(self, buffer, offset, df):
+        self.values = buffer[offset:offset + 4 * df].cast("f")
+        offset += 4 * df
+        self.doc_ids = buffer[offset:offset + 4 * df].cast("I")
+        offset += 4 * df
+        self.by_position = buffer[offset:offset + 4 * df].cast("f")
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+class Positions:
+    """
+    Positions of a term in its documents. Only the requested documents are
+    decoded
+    """
+    def __init__(self, buffer, offset, df):
+        self.offsets = buffer[offset:offset + 4 * (df + 1)].cast("I")
+        self.data = buffer[offset + 4 * (df + 1):]
+
+    def get(self, i):
+        """
+        Returns the positions of the term in its i-th document
+        """
+        return list(accumulate(decode_varints(self.data, self.offsets[i],
+            self.offsets[i + 1])))
+
+def read_postings(meta, buffer, offset, df, idf, max_score):
+    """
+    Returns the postings of a term stored at an offset of a buffer
+    """
+    if meta.get("codec", "raw") == "raw":
+        tfs = buffer[offset:offset + 8 * df].cast("d")
+        offset += 8 * df
+        tf_idfs = buffer[offset:offset + 8 * df].cast("d")
+        offset += 8 * df
+        doc_ids = buffer[offset:offset + 4 * df].cast("I")
+        return Postings(idf, doc_ids, tfs, tf_idfs, max_score)
+
+    block_size = meta["block_size"]
+    blocks = math.ceil(df / block_size)
+    max_tf = buffer[offset:offset + 8].cast("d")[0]
+    offset += 8
+    last_docs = buffer[offset:offset + 4 * blocks].cast("I")
+    offset += 4 * blocks
+    offsets = buffer[offset:offset + 4 * (blocks + 1)].cast("I")
+    offset += 4 * (blocks + 1)
+    widths = buffer[offset:offset + blocks]
+    offset += blocks + (-(offset + blocks) % 8)
+    data = buffer[offset:offset + offsets[blocks]]
+    return Block_Postings(idf, df, block_size, max_tf / LEVELS, last_docs,
+        offsets, widths, data, max_score)
+
+def add_strings(writer, name, strings):
+    """
+    Writes a list of strings as a blob and a table with the offset of each one
+    """
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    writer.add_section(name + "_offsets", offsets)
+    writer.add_section(name, bytes(blob))
+
+class String_Table:
+    """
+    Read only sequence over a list of strings stored in the index file
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+class Postings:
+    """
+    Postings of a term. The arrays are views on the mapped file
+    """
+    def __init__(self, idf, doc_ids, tfs, tf_idfs, max_score):
+        self.idf = idf              # idf value of the word
+        self.doc_ids = doc_ids      # Sorted ids of the documents
+        self.tfs = tfs              # tf value in each document
+        self.tf_idfs = tf_idfs      # tf * idf value in each document
+        self.max_score = max_score  # Highest tf * idf / norm of the documents
+        self.unit = 1.0             # tf * idf value of a weight of a block
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def seek(self, target, position):
+        """
+        Returns the first position from a given one whose document is not lower
+        than target
+        """
+        return bisect.bisect_left(self.doc_ids, target, position)
+
+    def block_count(self):
+        """
+        Returns the number of blocks. Plain postings are a single block
+        """
+        return 1
+
+    def block(self, block):
+        """
+        Returns the documents and weights of a block. The tf-idf value of a
+        document is its weight multiplied by unit
+        """
+        return self.doc_ids, self.tf_idfs
+
+    def find_block(self, target, block):
+        """
+        Returns the first block from a given one that can contain target
+        """
+        if self.doc_ids[-1] < target:
+            return 1
+        return block
+
+    def __str__(self):
+        return "idf: " + str(self.idf) + " Documents -> " + str(len(self))
+
+class Block_Postings:
+    """
+    Compressed postings of a term. Each block is decoded the first time one of
+    its documents is needed
+    """
+    def __init__(self, idf, df, block_size, scale, last_docs, offsets, widths,
+            data, max_score):
+        self.idf = idf                  # idf value of the word
+        self.df = df                    # Number of documents
+        self.block_size = block_size    # Number of documents of each block
+        self.scale = scale              # Value of one step of the quantized tf
+        self.last_docs = last_docs      # Last document of each block
+        self.offsets = offsets          # Offset of each block in data
+        self.widths = widths            # Bytes per gap of each block
+        self.data = data                # Encoded blocks
+        self.max_score = max_score      # Highest tf * idf / norm of the documents
+        self.unit = scale * idf         # tf * idf value of a quantized step
+        self.blocks = {}                # Decoded blocks
+
+    @property
+    def doc_ids(self):
+        """
+        Sequence with the ids of the documents
+        """
+        return Block_Array(self, 0, 1)
+
+    @property
+    def tfs(self):
+        """
+        Sequence with the tf value in each document
+        """
+        return Block_Array(self, 1, self.scale)
+
+    @property
+    def tf_idfs(self):
+        """
+        Sequence with the tf * idf value in each document
+        """
+        return Block_Array(self, 1, self.unit)
+
+    def decode(self, block):
+        """
+        Returns the documents and the quantized tf values of a block
+        """
+        if self.blocks.get(block) == None:
+            count = min(self.block_size, self.df - block * self.block_size)
+            width = self.widths[block]
+            start = self.offsets[block]
+            # The gaps and the weights are read from the file without copying
+            gaps = self.data[start:start + width * count].cast(GAP_TYPES[width])
+            start += width * count
+            quantized = self.data[start:start + 2 * count].cast("H")
+
+            previous = self.last_docs[block - 1] if block > 0 else 0
+            doc_ids = list(accumulate(gaps, initial=previous))
+            del doc_ids[0]
+            self.blocks[block] = (doc_ids, quantized)
+        return self.blocks[block]
+
+    def block_count(self):
+        """
+        Returns the number of blocks
+        """
+        return len(self.last_docs)
+
+    def block(self, block):
+        """
+        Returns the documents and quantized weights of a block. The tf-idf value
+        of a document is its weight multiplied by unit
+        """
+        return self.decode(block)
+
+    def find_block(self, target, block):
+        """
+        Returns the first block from a given one that can contain target, using
+        the last document of each block as skip pointers
+        """
+        if self.last_docs[block] >= target:
+            return block
+        return bisect.bisect_left(self.last_docs, target, block)
+
+    def seek(self, target, position):
+        """
+        Returns the first position from a given one whose document is not lower
+        than target. The skip pointers avoid decoding the blocks in between
+        """
+        block = position // self.block_size
+        if block >= len(self.last_docs):
+            return self.df
+        if self.last_docs[block] < target:
+            block = self.find_block(target, block)
+            if block == len(self.last_docs):
+                return self.df
+            position = block * self.block_size
+        doc_ids = self.decode(block)[0]
+        first = block * self.block_size
+        return first + bisect.bisect_left(doc_ids, target, position - first)
+
+    def __len__(self):
+        return self.df
+
+    def __str__(self):
+        return "idf: " + str(self.idf) + " Documents -> " + str(len(self))
+
+class Block_Array:
+    """
+    Read only sequence over one of the values of compressed postings. The
+    values of the field are multiplied by factor
+    """
+    def __init__(self, postings, field, factor):
+        self.postings = postings
+        self.field = field
+        self.factor = factor
+        self.decoded = {}
+
+    def __len__(self):
+        return self.postings.df
+
+    def __getitem__(self, i):
+        if i < 0 or i >= self.postings.df:
+            raise IndexError(i)
+        block, i = divmod(i, self.postings.block_size)
+        return self.values(block)[i]
+
+    def __iter__(self):
+        for block in range(len(self.postings.last_docs)):
+            yield from self.values(block)
+
+    def values(self, block):
+        """
+        Returns the values of a block
+        """
+        if self.field == 0:
+            return self.postings.decode(block)[0]
+        # The weights are only calculated when they are needed
+        if self.decoded.get(block) == None:
+            quantized = self.postings.decode(block)[1]
+            self.decoded[block] = [q * self.factor for q in quantized]
+        return self.decoded[block]
+
+class Sections_Reader:
+    """
+    Gives access to the sections of a file written by Sections_Writer without
+    loading it in memory
+    """
+    def __init__(self, filename, magic):
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        offset, length, found = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size)
+        if found != magic or self.map[0:len(magic)] != magic:
+            raise Exception("Invalid file: " + filename)
+        toc = json.loads(str(self.map[offset:offset + length], "utf-8"))
+        self.meta = toc["meta"]
+        self.sections = toc["sections"]
+        # Identifies this build of the file. Every build is a new file, so it
+        # changes whenever it is built again
+        status = os.fstat(self.file.fileno())
+        self.generation = (status.st_dev, status.st_ino, status.st_mtime_ns)
+
+    def section(self, name, typecode=None):
+        """
+        Returns a view of a section of the file, as an array if a type is given
+        """
+        offset, length = self.sections[name]
+        view = self.view[offset:offset + length]
+        if typecode != None:
+            view = view.cast(typecode)
+        return view
+
+    def has_section(self, name):
+        """
+        Checks if the file contains a section
+        """
+        return name in self.sections
+
+    def close(self):
+        """
+        Releases the mapped file. The views of its sections must be released
+        before
+        """
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+class Index_Reader(Sections_Reader):
+    """
+    Gives access to a binary index without loading it in memory
+    """
+    def __init__(self, filename):
+        super().__init__(filename, MAGIC)
+        self.doc_names = String_Table(self.section("doc_names"),
+            self.section("doc_names_offsets", "Q"))
+        self.terms = String_Table(self.section("terms"),
+            self.section("terms_offsets", "Q"))
+        self.idfs = self.section("term_idf", "d")
+        self.offsets = self.section("term_offset", "Q")
+        self.dfs = self.section("term_df", "I")
+        self.norms = self.section("doc_norm", "d")
+        self.max_scores = self.section("term_max_score", "d")
+        self.positions = None
+        if self.has_section("term_positions"):
+            self.positions = self.section("term_positions", "Q")
+        self.impacts = self.lengths = None
+        if self.has_section("term_impacts"):
+            self.impacts = self.section("term_impacts", "Q")
+            self.lengths = self.section("doc_length", "I")
+        # Indexes saved before the common terms were recorded have none
+        self.common_terms = []
+        if self.has_section("common_terms"):
+            self.common_terms = String_Table(self.section("common_terms"),
+                self.section("common_terms_offsets", "Q"))
+
+    def find(self, term):
+        """
+        Returns the position of a term in the dictionary or -1
+        """
+        position = bisect.bisect_left(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            return position
+        return -1
+
+    def postings(self, position):
+        """
+        Returns the postings of the term stored in a position of the dictionary
+        """
+        return read_postings(self.meta, self.view, self.offsets[position],
+            self.dfs[position], self.idfs[position], self.max_scores[position])
+
+    def term_positions(self, position):
+        """
+        Returns the positions of the term stored in a position of the dictionary
+        or None if they were not saved
+        """
+        if self.positions == None or self.positions[position] == 0:
+            return None
+        return Positions(self.view, self.positions[position], self.dfs[position])
+
+    def term_impacts(self, position):
+        """
+        Returns the BM25 impacts of the term stored in a position of the
+        dictionary or None if they were not saved
+        """
+        if self.impacts == None or self.impacts[position] == 0:
+            return None
+        return Impacts(self.view, self.impacts[position], self.dfs[position])
+
+    def bm25_idf(self, position):
+        """
+        Returns the BM25 idf value of the term stored in a position of the
+        dictionary
+        """
+        df = self.dfs[position]
+        return math.log(1 + (self.documents() - df + 0.5) / (df + 0.5))
+
+    def get(self, term):
+        """
+        Returns the postings of a term or None if it is not in the index
+        """
+        position = self.find(term)
+        if position == -1:
+            return None
+        return self.postings(position)
+
+    def is_common(self, term):
+        """
+        Returns whether a term appears in every document, so it was left out
+        of the dictionary
+        """
+        position = bisect.bisect_left(self.common_terms, term)
+        return position < len(self.common_terms) and \
+            self.common_terms[position] == term
+
+    def __contains__(self, term):
+        return self.find(term) != -1
+
+    def __len__(self):
+        return len(self.terms)
+
+    def documents(self):
+        """
+        Returns the number of documents in the index
+        """
+        return len(self.doc_names)
+
+    def close(self):
+        """
+        Releases the mapped file
+        """
+        self.idfs = self.offsets = self.dfs = self.norms = None
+        self.max_scores = self.positions = None
+        self.impacts = self.lengths = None
+        self.terms = self.doc_names = self.common_terms = None
+        super().close()
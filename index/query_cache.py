@@ -0,0 +1,132 @@
+#-------------------------------------------------------------------------------
+# Name:        Query cache
+# Purpose:     Avoids resolving the same query again. The analyzed terms of each
+#              query string and the results of each analyzed query are kept in
+#              LRU caches with a maximum size and a time to live. The results
+#              are discarded when a new index is loaded.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from collections import OrderedDict
+import resolve_queries
+import time
+
+# Maximum number of entries and seconds that an entry is valid
+results_size = 10000
+results_ttl = 600
+terms_size = 10000
+terms_ttl = 3600
+
+class LRU_Cache:
+    """
+    Cache that removes the least recently used entry when it is full and the
+    entries older than ttl seconds
+    """
+    def __init__(self, size, ttl):
+        self.size = size            # Maximum number of entries
+        self.ttl = ttl              # Seconds that an entry is valid
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the value of a key or None if it is not in the cache
+        """
+        entry = self.entries.get(key)
+        if entry == None or time.monotonic() - entry[0] > self.ttl:
+            if entry != None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        """
+        Stores the value of a key
+        """
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        self.entries.clear()
+
+    def statistics(self):
+        """
+        Returns the number of entries, hits and misses
+        """
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+# Analyzed terms of each query string
+terms_cache = LRU_Cache(terms_size, terms_ttl)
+# Results of each analyzed query
+results_cache = LRU_Cache(results_size, results_ttl)
+# Generation of the index of the cached results
+generation = None
+
+def normalize(query):
+    """
+    Given a query returns it in lower case with single spaces
+    """
+    return " ".join(query.lower().split())
+
+def analyze(query):
+    """
+    Given a query returns its stemmed terms with their weights, sorted by term.
+    Wildcards and fuzzy words are replaced by the terms of the index
+    """
+    key = normalize(query)
+    terms = terms_cache.get(key)
+    if terms == None:
+        tfs = resolve_queries.expand_query(key)
+        terms = tuple(sorted(tfs.items()))
+        terms_cache.put(key, terms)
+    return terms
+
+def resolve_cached(query, k, method=None):
+    """
+    Given a query returns the k texts with the highest relevance value, using
+    the cached results when the same terms were resolved with the same index
+    and method ("cosine" or "bm25", by default the global scoring)
+    """
+    return resolve_analyzed(query, k, method)[1]
+
+def resolve_analyzed(query, k, method=None):
+    """
+    Same as resolve_cached, but returns the terms of the query too, so they
+    are not analyzed (and counted in the terms cache) again
+    """
+    global generation
+
+    if method == None:
+        method = resolve_queries.scoring
+
+    if resolve_queries.index.generation != generation:
+        # The expansions of the queries depend on the terms of the index
+        terms_cache.clear()
+        results_cache.clear()
+        generation = resolve_queries.index.generation
+
+    terms = analyze(query)
+    key = (generation, terms, k, method)
+    results = results_cache.get(key)
+    if results == None:
+        results = resolve_queries.resolve(dict(terms), k, method)
+        results_cache.put(key, results)
+    return terms, results
+
+def statistics():
+    """
+    Returns the statistics of both caches
+    """
+    return {"terms": terms_cache.statistics(), "results": results_cache.statistics()}
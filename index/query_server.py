@@ -0,0 +1,201 @@
+#-------------------------------------------------------------------------------
+# Name:        Query server
+# Purpose:     Keeps the index and the texts loaded and answers queries through
+#              a small HTTP/JSON interface. The index is replaced without
+#              stopping the server when a new one is built.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Index_Reader
+from document_store import Document_Store
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import resolve_queries
+import query_cache
+import asyncio
+import json
+import math
+import os
+import time
+
+# Address of the server
+host = "127.0.0.1"
+port = 8080
+# Files used by the server
+index_file = "index.bin"
+store_file = "documents.bin"
+# Seconds between checks for a new index
+reload_interval = 1.0
+# Number of recent queries used to calculate the latency percentiles
+latency_window = 10000
+
+class Query_Server:
+    """
+    Data structure to store the state of the server
+    """
+    def __init__(self):
+        self.loaded = None              # Times of the index and the store files
+        self.latencies = deque(maxlen=latency_window)   # Seconds per query
+        self.queries = 0                                # Number of queries
+        # Thread that resolves the requests, one at a time, out of the event loop
+        self.worker = ThreadPoolExecutor(max_workers=1)
+
+    def load(self):
+        """
+        Opens the index and the document store if any of their files changed.
+        The index is written before the store, so they are only replaced when
+        both have the same documents. The query functions read the globals of
+        resolve_queries, which are replaced between two queries, so the old
+        files are closed once no query uses them
+        """
+        modified = (os.stat(index_file).st_mtime_ns, os.stat(store_file).st_mtime_ns)
+        if modified == self.loaded:
+            return False
+        store = Document_Store(store_file)
+        index = Index_Reader(index_file)
+        if len(store) != index.documents():
+            store.close()
+            index.close()
+            raise Exception("The index and the document store do not match")
+        old = (resolve_queries.store, resolve_queries.index)
+        resolve_queries.store = store
+        resolve_queries.index = index
+        self.loaded = modified
+        for reader in old:
+            if reader != None:
+                reader.close()
+        return True
+
+    def search(self, query, k, method=None):
+        """
+        Resolves a query and returns its results. It runs in the worker thread,
+        so the connections are served while a query is resolved and it never
+        sees the index being replaced
+        """
+        start = time.perf_counter()
+        results = []
+        store = resolve_queries.store
+        terms, found = query_cache.resolve_analyzed(query, k, method)
+        terms = dict(terms)
+        for name, value in found:
+            results.append({"id": name, "value": value,
+                "text": store.snippet(store.find(name), terms)})
+        self.latencies.append(time.perf_counter() - start)
+        self.queries += 1
+        return {"query": query, "results": results}
+
+    def statistics(self):
+        """
+        Returns the number of queries and the p50 and p99 latencies in ms
+        """
+        latencies = sorted(self.latencies)
+        result = {"queries": self.queries, "documents": resolve_queries.index.documents(),
+            "cache": query_cache.statistics()}
+        for percentile in (50, 99):
+            if latencies:
+                position = math.ceil(percentile / 100 * len(latencies)) - 1
+                result["p" + str(percentile)] = latencies[position] * 1000
+            else:
+                result["p" + str(percentile)] = None
+        return result
+
+    def route(self, method, target):
+        """
+        Given a request returns the status and the body of the response
+        """
+        url = urlsplit(target)
+        parameters = parse_qs(url.query)
+        if url.path == "/search" and parameters.get("q") != None:
+            k = int(parameters.get("k", [resolve_queries.k])[0])
+            if k < 1:
+                raise ValueError("k must be at least 1")
+            method = parameters.get("scoring", [resolve_queries.scoring])[0]
+            return 200, self.search(parameters["q"][0], k, method)
+        elif url.path == "/stats":
+            return 200, self.statistics()
+        elif url.path == "/reload" and method == "POST":
+            return 200, {"reloaded": self.load()}
+        return 404, {"error": "Not found"}
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of a connection
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0)) > 0:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                try:
+                    status, body = await asyncio.get_running_loop().run_in_executor(
+                        self.worker, self.route, method, target)
+                except Exception as error:
+                    status, body = 400, {"error": str(error)}
+                body = json.dumps(body).encode("utf-8")
+                close = headers.get("connection", "").lower() == "close"
+                writer.write(("HTTP/1.1 " + str(status) + " " +
+                    ("OK" if status == 200 else "Error") + "\r\n" +
+                    "Content-Type: application/json\r\n" +
+                    "Content-Length: " + str(len(body)) + "\r\n" +
+                    ("Connection: close\r\n" if close else "") +
+                    "\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if close:
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """
+        Checks periodically if there is a new index
+        """
+        while True:
+            await asyncio.sleep(reload_interval)
+            try:
+                if await asyncio.get_running_loop().run_in_executor(self.worker,
+                        self.load):
+                    print("New index loaded")
+            except Exception as error:
+                print("The index could not be loaded:", error)
+
+async def serve():
+    """
+    Starts the server
+    """
+    server = Query_Server()
+    server.load()
+    watcher = asyncio.create_task(server.watch())
+    listener = await asyncio.start_server(server.handle, host, port)
+    print("Serving on http://" + host + ":" + str(port))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        watcher.cancel()
+        server.worker.shutdown()
+
+def main():
+    """
+    Starts the query server
+    """
+    asyncio.run(serve())
+
+if __name__ == '__main__':
+    main()
@@ -1,209 +1,602 @@
-#-------------------------------------------------------------------------------
-# Name:        Resolving queries with an index
-# Purpose:     Once the index is created, it is used for quick resolution of a 
-#              series of queries. For each query, the 10 most relevant texts are 
-#              returned.
-#
-# Author:      Sergio Murillo
-#
-# Created:     27/10/2022
-#-------------------------------------------------------------------------------
-
-import pickle
-import random
-from textblob import TextBlob
-import math
-
-# Auxiliary dictionary for the index
-index = {}
-# Auxiliary dictionary to save the texts
-saved_texts = {}
-# Auxiliary dictionary for the queries
-queries = {}
-
-def resolve_query(terms):
-    """
-    Given a query, returns the texts with their relevance value
-    """
-    global index
-
-    # Dictionary with the values of B for all candidates
-    candidates_b, candidates_b2 = get_candidates(terms) 
-    a, a2 = calculate_a(terms)
-    results = {}
-    
-    for candidate in candidates_b:
-        num = 0
-        for term in terms:
-            # If the query term is in the document we perform A * B
-            try:
-                num +=  a[term] * index.get(term).idf * index.get(term).documents[candidate].tf_idf
-            # Else A * B will be 0
-            except:
-                num += 0
-              
-        results[candidate] = calculate_value(a2, candidates_b2[candidate], num)
-    
-    return results
-
-def calculate_value(a2, b2, num):
-    """
-    Given a candidate calculates its relevance value
-    """
-    value = num / (a2 * b2)
-
-    return value
-    
-def calculate_a(terms):
-    """
-    Given a series of terms calculate the value of A^2 and A for each term
-    """
-    global index
-    a2 = 0
-    a = {}
-    for term in terms:
-        if (index.get(term) != None):
-            a2 += math.pow(index.get(term).idf * terms[term], 2)
-            a[term] =  index.get(term).idf * terms[term]
-    
-    a2 = math.sqrt(a2)
-    return a, a2
-        
-def get_candidates(terms):
-    """
-    Given a set of terms of a query, returns all possible texts that can be a 
-    result with value of B and B^2
-    """
-    global index
-    candidates_b = {}
-    candidates_b2 = {}
-    aux = {}
-
-    for term in terms:
-        if index.get(term) != None:
-            for document in index.get(term).documents:
-                if candidates_b.get(document) == None:
-                    candidates_b[document] = index.get(term).documents[document].tf_idf
-                    candidates_b2[document] = math.pow(index.get(term).documents[document].tf_idf,2)
-                else:
-                    candidates_b[document] += index.get(term).documents[document].tf_idf
-                    candidates_b2[document] += math.pow(index.get(term).documents[document].tf_idf,2)
-    
-    for item in candidates_b2:
-        candidates_b2[item] = math.sqrt(candidates_b2[item])
-    
-    return candidates_b, candidates_b2
-
-def weighting_tf(texts):
-    """
-    Given a dictionary with the texts, returns a dictionary with the weights of
-    each word in each text
-    """
-    counters = counter_terms(texts)
-    tfs = relative_frequency(counters)
-            
-    return tfs
-
-def relative_frequency(counters):
-    """
-    Given a dictionary with the counters of each word in each text, returns a
-    dictionary with the relative frequency of each word in each text
-    """
-    tfs = {}
-    for text in counters:
-        aux = {}
-        for word in counters[text]:
-            aux[word] = counters[text][word] / len(counters[text])
-        tfs[text] = aux
-    return tfs
-
-def counter_terms(texts):
-    """
-    Given a dictionary with the texts, returns a dictionary with the counters of
-    each word in each text
-    """
-    counters = {}
-    for text in texts:
-        aux = {}
-        blob = TextBlob(texts.get(text).lower())
-        tokens = blob.words
-        for token in tokens:
-            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
-            token = token.stem()
-            if aux.get(token) == None:
-                    aux[token] = 1
-            else:
-                aux[token] += 1
-        counters[text] = aux
-    return counters
-
-def load_index():
-    """
-    Loads the index from a .pkl file
-    """
-    global index 
-
-    index = pickle.load(open("index.pkl", "rb"))
-
-def load_queries(filename):
-    """
-    Reads the queries from a .txt file
-    """
-    global queries
-
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        lines = [line.rstrip() for line in lines]
-
-    for line in lines:
-        separator = line.split('\t')
-        result = ''
-        for i in range(1, len(separator)):
-            result += separator[i] + " "
-        queries[separator[0]] = result
-
-def load_texts(filename):
-    """
-    Given a .txt file store the contents of each of its lines
-    """
-    global saved_texts
-
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        lines = [line.rstrip() for line in lines]
-
-    for line in lines:
-        separator = line.split('\t')
-        saved_texts[separator[0].rstrip()] = separator[1]
-
-def get_results(tfs):
-    """
-    Stores possibly relevant texts in a .txt file 
-    """
-    with open("result.txt", 'w') as file:
-        for term in tfs:
-            file.writelines("Query" + term + "\n")
-            ids = resolve_query(tfs[term])
-            ids = sorted(ids.items(), key=lambda x: x[1], reverse=True)
-            for i in range(10):
-                file.writelines(saved_texts[ids[i][0]][0:280] + "\n\n")
-            file.writelines("\n")
-
-def main():
-    """
-    Resolves the queries from a .txt file and saves the results in a .txt file
-    """
-    global queries
-    global saved_texts
-
-    load_index()
-    load_queries("cran-queries.txt")
-    load_texts("cran-1400.txt")
-    tfs = weighting_tf(queries)     # Calculate the weights of each word in 
-                                    # each text
-    get_results(tfs)                # Get the results of the queries
-            
-    
-
-if __name__ == '__main__':
-    main()
+#-------------------------------------------------------------------------------
+# Name:        Resolving queries with an index
+# Purpose:     Once the index is created, it is used for quick resolution of a 
+#              series of queries. For each query, the 10 most relevant texts are 
+#              returned.
+#
+# Author:      Sergio Murillo
+#
+# Created:     27/10/2022
+#-------------------------------------------------------------------------------
+
+from index_file import Index_Reader
+from document_store import Document_Store
+import term_dictionary
+import bisect
+import heapq
+import random
+from textblob import TextBlob
+import math
+import re
+
+# Auxiliary reader for the index
+index = None
+# Auxiliary store with the texts, read from disk when needed
+store = None
+# Statistics of the whole collection when the index is one of its shards
+# (shards.Collection), None when the index has the whole collection
+statistics = None
+# Auxiliary dictionary for the queries
+queries = {}
+# Query evaluation:
+#   - Use "top_k" to keep only the k best texts, skipping those that can not
+#     reach them (MaxScore)
+#   - Use "exhaustive" to calculate the value of every candidate
+retrieval = "top_k"
+# Relevance value of the texts:
+#   - Use "cosine" for the cosine between the tf-idf vectors of query and text
+#   - Use "bm25" for BM25, which needs an index with impacts
+scoring = "cosine"
+# Number of impacts read at a time from a term in BM25 top-k queries
+chunk_size = 128
+# Maximum number of terms of the index that replace a word of a query with
+# wildcards (aerodyn*, h?at) or a fuzzy word (aerodinamic~1)
+max_expansions = 50
+# Highest edit distance of a fuzzy word
+max_distance = 2
+# Number of texts returned for each query
+k = 10
+
+def resolve_query(terms):
+    """
+    Given a query, returns the texts with their relevance value
+    """
+    global index
+
+    postings = get_postings(terms)
+    a, a2 = calculate_a(postings, terms)
+    nums = {}
+
+    # A single pass over the postings of the query terms. Only the documents
+    # that contain a query term add A * B
+    for term in postings:
+        factor = a[term] * postings[term].unit
+        for block in range(postings[term].block_count()):
+            doc_ids, weights = postings[term].block(block)
+            for document, weight in zip(doc_ids, weights):
+                nums[document] = nums.get(document, 0) + factor * weight
+
+    results = {}
+    for candidate in nums:
+        # The norm of B is precomputed over the whole document vector
+        results[index.doc_names[candidate]] = calculate_value(a2,
+            index.norms[candidate], nums[candidate])
+
+    return results
+
+def resolve_top_k(terms, k):
+    """
+    Given a query, returns the k texts with the highest relevance value sorted
+    by value. The postings are traversed document by document and the terms
+    whose upper bounds can not lift a text above the k-th value are only used
+    to complete the value of the texts found through the rest of terms
+    """
+    global index
+
+    postings = get_postings(terms)
+    a, a2 = calculate_a(postings, terms)
+
+    # Terms sorted by the highest value they can add to a text
+    order = sorted(postings, key=lambda term: postings[term].max_score)
+    lists = [postings[term] for term in order]
+    factors = [a[term] * postings[term].unit for term in order]
+    upper = []
+    total = 0
+    for term in order:
+        total += a[term] * postings[term].max_score / a2
+        upper.append(total)
+
+    # Current block, position in the block and document of each term. Finished
+    # terms point to a document that does not exist
+    end = index.documents()
+    blocks = [0] * len(order)
+    doc_ids = [None] * len(order)
+    weights = [None] * len(order)
+    positions = [0] * len(order)
+    current = [end] * len(order)
+
+    def load(i, block):
+        """
+        Moves a term to the first document of a block
+        """
+        blocks[i] = block
+        positions[i] = 0
+        if block < lists[i].block_count():
+            doc_ids[i], weights[i] = lists[i].block(block)
+            current[i] = doc_ids[i][0]
+        else:
+            current[i] = end
+
+    for i in range(len(order)):
+        load(i, 0)
+
+    heap = []
+    threshold = 0
+    # Terms before this one can not make a text enter the results on their own
+    essential = 0
+    while essential < len(order):
+        # Next candidate: the lowest document among the essential terms
+        candidate = min(current[essential:])
+        if candidate == end:
+            break
+
+        norm = a2 * index.norms[candidate]
+        num = 0
+        for i in range(essential, len(order)):
+            if current[i] == candidate:
+                num += factors[i] * weights[i][positions[i]]
+                positions[i] += 1
+                if positions[i] < len(doc_ids[i]):
+                    current[i] = doc_ids[i][positions[i]]
+                else:
+                    load(i, blocks[i] + 1)
+
+        # Complete the value with the non essential terms while it can still
+        # reach the threshold
+        for i in range(essential - 1, -1, -1):
+            if num / norm + upper[i] <= threshold:
+                break
+            if current[i] < candidate:
+                # The skip pointers give the block, the document is searched
+                # inside it
+                block = lists[i].find_block(candidate, blocks[i])
+                if block != blocks[i]:
+                    load(i, block)
+                if current[i] != end:
+                    positions[i] = bisect.bisect_left(doc_ids[i], candidate, positions[i])
+                    current[i] = doc_ids[i][positions[i]]
+            if current[i] == candidate:
+                num += factors[i] * weights[i][positions[i]]
+
+        value = num / norm
+        if len(heap) < k:
+            heapq.heappush(heap, (value, -candidate))
+        elif value > heap[0][0]:
+            heapq.heapreplace(heap, (value, -candidate))
+        if len(heap) == k:
+            threshold = heap[0][0]
+            while essential < len(order) and upper[essential] <= threshold:
+                essential += 1
+
+    results = []
+    for value, candidate in sorted(heap, reverse=True):
+        results.append((index.doc_names[-candidate], value))
+
+    return results
+
+def resolve_query_bm25(terms):
+    """
+    Given a query, returns the texts with their BM25 value
+    """
+    global index
+
+    impacts = get_impacts(terms)
+    nums = {}
+    for weight, element, postings in impacts.values():
+        for document, impact in zip(element.doc_ids, element.values):
+            nums[document] = nums.get(document, 0) + weight * impact
+
+    results = {}
+    for candidate in nums:
+        results[index.doc_names[candidate]] = nums[candidate]
+
+    return results
+
+def resolve_top_k_bm25(terms, k):
+    """
+    Given a query, returns the k texts with the highest BM25 value sorted by
+    value. The impacts are read in chunks from the term whose next impact is
+    the highest. A text can not gain more than the sum of the next impacts of
+    all the terms, so the reading stops when that can not lift any other text
+    above the k best ones, and only these are completed with the impacts that
+    were not read
+    """
+    global index
+
+    lists = list(get_impacts(terms).values())
+    places = [0] * len(lists)
+    nums = {}
+    # The k + 1 texts with the highest values so far, in a dictionary and in a
+    # heap whose entries are outdated when the value of their text grew. A text
+    # only enters them with a value higher than floor, the lowest of them
+    top = {}
+    entries = []
+    floor = 0
+    # k-th value of the last check. The values only grow, so it can not stop
+    # while the bound is higher
+    threshold = 0
+    while True:
+        heads = []
+        for (weight, element, postings), place in zip(lists, places):
+            heads.append(weight * element.values[place] if place < len(element) else 0)
+        bound = sum(heads)
+        if bound == 0:
+            break
+        if len(top) >= k and (threshold == 0 or bound <= threshold):
+            best = sorted(top.values(), reverse=True)
+            threshold = best[k - 1]
+            if threshold >= bound + (best[k] if len(best) > k else 0):
+                break
+
+        i = max(range(len(lists)), key=heads.__getitem__)
+        weight, element = lists[i][0], lists[i][1]
+        start = places[i]
+        places[i] = min(start + chunk_size, len(element))
+        for document, impact in zip(element.doc_ids[start:places[i]],
+                element.values[start:places[i]]):
+            value = nums.get(document, 0) + weight * impact
+            nums[document] = value
+            if value > floor:
+                top[document] = value
+                heapq.heappush(entries, (value, document))
+                if len(top) > k + 1:
+                    # The lowest text leaves, its outdated entries are skipped
+                    while top.get(entries[0][1]) != entries[0][0]:
+                        heapq.heappop(entries)
+                    del top[heapq.heappop(entries)[1]]
+                if len(top) == k + 1:
+                    while top.get(entries[0][1]) != entries[0][0]:
+                        heapq.heappop(entries)
+                    floor = entries[0][0]
+
+    heap = []
+    for candidate in heapq.nlargest(k, top, key=top.get):
+        # The value is calculated again with all the terms in the query order
+        value = 0
+        for weight, element, postings in lists:
+            place = postings.seek(candidate, 0)
+            if place < len(postings) and postings.doc_ids[place] == candidate:
+                value += weight * element.by_position[place]
+        heap.append((value, -candidate))
+
+    results = []
+    for value, candidate in sorted(heap, reverse=True):
+        results.append((index.doc_names[-candidate], value))
+
+    return results
+
+def resolve(terms, k, method=None):
+    """
+    Given a query, returns the k texts with the highest relevance value sorted
+    by value. method is "cosine" or "bm25", by default the global scoring
+    """
+    if method == None:
+        method = scoring
+    if method == "cosine" and retrieval == "top_k":
+        return resolve_top_k(terms, k)
+    elif method == "cosine" and retrieval == "exhaustive":
+        ids = resolve_query(terms)
+    elif method == "bm25" and retrieval == "top_k":
+        return resolve_top_k_bm25(terms, k)
+    elif method == "bm25" and retrieval == "exhaustive":
+        ids = resolve_query_bm25(terms)
+    else:
+        raise Exception("Invalid retrieval or scoring")
+    return sorted(ids.items(), key=lambda x: x[1], reverse=True)[0:k]
+
+def resolve_phrase(text, k, distance=None):
+    """
+    Given a phrase, returns the k texts with the highest relevance value that
+    contain its words consecutively or, if distance is given, with all of them
+    within a window of distance words. The positions are only read for the texts
+    that contain every word
+    """
+    global index
+
+    tokens = stem_tokens(text)
+    terms = weighting_tf({"phrase": text})["phrase"]
+    postings = get_postings(terms)
+    if len(postings) == 0:
+        return []
+    # A word without postings can only be skipped if it is in every text
+    for term in terms:
+        if postings.get(term) == None and not index.is_common(term):
+            return []
+    a, a2 = calculate_a(postings, terms)
+
+    positions = {}
+    for term in postings:
+        positions[term] = index.term_positions(index.find(term))
+        if positions[term] == None:
+            raise Exception("The index does not have positions")
+
+    # The shortest postings give the candidates, the rest are searched
+    order = sorted(postings, key=lambda term: len(postings[term]))
+    places = {}
+    for term in order:
+        places[term] = 0
+
+    heap = []
+    for i, candidate in enumerate(postings[order[0]].doc_ids):
+        places[order[0]] = i
+        found = True
+        for term in order[1:]:
+            places[term] = postings[term].seek(candidate, places[term])
+            if places[term] == len(postings[term]) or \
+                    postings[term].doc_ids[places[term]] != candidate:
+                found = False
+                break
+        if not found:
+            continue
+
+        lists = {}
+        for term in order:
+            lists[term] = positions[term].get(places[term])
+        if not match_positions(tokens, lists, distance):
+            continue
+
+        num = 0
+        for term in order:
+            num += a[term] * postings[term].tf_idfs[places[term]]
+        value = calculate_value(a2, index.norms[candidate], num)
+        if len(heap) < k:
+            heapq.heappush(heap, (value, -candidate))
+        elif value > heap[0][0]:
+            heapq.heapreplace(heap, (value, -candidate))
+
+    results = []
+    for value, candidate in sorted(heap, reverse=True):
+        results.append((index.doc_names[-candidate], value))
+
+    return results
+
+def match_positions(tokens, lists, distance):
+    """
+    Given the words of a phrase and the positions of the indexed ones in a text,
+    checks if the text contains the phrase (distance None) or all the words
+    within distance words. Words that are not in the index, which are in every
+    text, match any word
+    """
+    if distance == None:
+        anchors = [(place, token) for place, token in enumerate(tokens)
+            if lists.get(token) != None]
+        first_place, first = anchors[0]
+        sets = {}
+        for place, token in anchors:
+            sets[token] = set(lists[token])
+        for start in lists[first]:
+            start -= first_place
+            if all(start + place in sets[token] for place, token in anchors):
+                return True
+        return False
+
+    # Smallest window that contains all the words
+    merged = sorted((place, term) for term in lists for place in lists[term])
+    counts = {}
+    left = 0
+    for place, term in merged:
+        counts[term] = counts.get(term, 0) + 1
+        while len(counts) == len(lists):
+            if place - merged[left][0] <= distance:
+                return True
+            counts[merged[left][1]] -= 1
+            if counts[merged[left][1]] == 0:
+                del counts[merged[left][1]]
+            left += 1
+    return False
+
+def stem_tokens(text):
+    """
+    Given a text, returns its stemmed words in order
+    """
+    return [token.stem() for token in TextBlob(text.lower()).words]
+
+def get_postings(terms):
+    """
+    Given a series of terms returns the postings of those that are in the index
+    """
+    global index
+    postings = {}
+    for term in terms:
+        element = index.get(term)
+        if element != None:
+            postings[term] = element
+
+    return postings
+
+def get_impacts(terms):
+    """
+    Given a series of terms returns, for those that are in the index, their
+    BM25 weight in the query, their impacts and their postings
+    """
+    global index
+    impacts = {}
+    for term in terms:
+        position = index.find(term)
+        if position == -1:
+            continue
+        element = index.term_impacts(position)
+        if element == None:
+            raise Exception("The index does not have BM25 impacts")
+        if statistics != None:
+            idf = statistics.bm25_idf(term)
+        else:
+            idf = index.bm25_idf(position)
+        impacts[term] = (idf * terms[term], element, index.postings(position))
+
+    return impacts
+
+def calculate_value(a2, b2, num):
+    """
+    Given a candidate calculates its relevance value
+    """
+    value = num / (a2 * b2)
+
+    return value
+    
+def calculate_a(postings, terms):
+    """
+    Given the postings of a series of terms calculate the value of A^2 and A for
+    each term
+    """
+    a2 = 0
+    a = {}
+    for term in terms:
+        if postings.get(term) != None:
+            a2 += math.pow(postings[term].idf * terms[term], 2)
+            a[term] = postings[term].idf * terms[term]
+        elif statistics != None and statistics.idf(term) != None:
+            # The term is in other shards, its weight is part of A
+            a2 += math.pow(statistics.idf(term) * terms[term], 2)
+    
+    a2 = math.sqrt(a2)
+    return a, a2
+        
+def expand_query(text):
+    """
+    Given a query that can contain words with wildcards (* any characters, ?
+    one character) or fuzzy words (word~ or word~distance), returns the weight
+    of each term. These words are replaced by the terms of the index that match
+    them, the rest are weighted as in weighting_tf
+    """
+    words = []
+    rest = []
+    for word in text.lower().split():
+        if is_expandable(word):
+            words.append(word)
+        else:
+            rest.append(word)
+    counters = counter_terms({"query": " ".join(rest)})["query"]
+    vocabulary = index.terms if statistics == None else statistics.terms
+    for word in words:
+        if "~" in word:
+            word, distance = word.rsplit("~", 1)
+            distance = min(int(distance) if distance != "" else max_distance,
+                max_distance)
+            stems = stem_tokens(word)
+            if len(stems) == 0:
+                continue
+            terms = term_dictionary.fuzzy_terms(vocabulary, stems[0], distance)
+        else:
+            terms = term_dictionary.wildcard_terms(vocabulary, word)
+        for term in terms[0:max_expansions]:
+            counters[term] = counters.get(term, 0) + 1
+
+    return relative_frequency({"query": counters})["query"]
+
+def is_expandable(word):
+    """
+    Checks if a word of a query has wildcards or is fuzzy. A question mark at
+    the end of a word is taken as punctuation
+    """
+    if re.fullmatch(r"\w+~\d*", word):
+        return True
+    return re.fullmatch(r"\w[\w*?]*", word) != None and \
+        ("*" in word or "?" in word.rstrip("?"))
+
+def weighting_tf(texts):
+    """
+    Given a dictionary with the texts, returns a dictionary with the weights of
+    each word in each text
+    """
+    counters = counter_terms(texts)
+    tfs = relative_frequency(counters)
+            
+    return tfs
+
+def relative_frequency(counters):
+    """
+    Given a dictionary with the counters of each word in each text, returns a
+    dictionary with the relative frequency of each word in each text
+    """
+    tfs = {}
+    for text in counters:
+        aux = {}
+        for word in counters[text]:
+            aux[word] = counters[text][word] / len(counters[text])
+        tfs[text] = aux
+    return tfs
+
+def counter_terms(texts):
+    """
+    Given a dictionary with the texts, returns a dictionary with the counters of
+    each word in each text
+    """
+    counters = {}
+    for text in texts:
+        aux = {}
+        blob = TextBlob(texts.get(text).lower())
+        tokens = blob.words
+        for token in tokens:
+            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
+            token = token.stem()
+            if aux.get(token) == None:
+                    aux[token] = 1
+            else:
+                aux[token] += 1
+        counters[text] = aux
+    return counters
+
+def load_index():
+    """
+    Opens the binary index. The postings are read from disk when needed
+    """
+    global index 
+
+    index = Index_Reader("index.bin")
+
+def load_queries(filename):
+    """
+    Reads the queries from a .txt file
+    """
+    global queries
+
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        lines = [line.rstrip() for line in lines]
+
+    for line in lines:
+        separator = line.split('\t')
+        result = ''
+        for i in range(1, len(separator)):
+            result += separator[i] + " "
+        queries[separator[0]] = result
+
+def load_store(filename="documents.bin"):
+    """
+    Opens the document store with the texts
+    """
+    global store
+
+    store = Document_Store(filename)
+
+def get_results(tfs):
+    """
+    Stores possibly relevant texts in a .txt file 
+    """
+    with open("result.txt", 'w') as file:
+        for term in tfs:
+            file.writelines("Query" + term + "\n")
+            ids = resolve(tfs[term], k)
+            for i in range(len(ids)):
+                file.writelines(store.text(ids[i][0])[0:280] + "\n\n")
+            file.writelines("\n")
+
+def main():
+    """
+    Resolves the queries from a .txt file and saves the results in a .txt file
+    """
+    global queries
+
+    load_index()
+    load_queries("cran-queries.txt")
+    load_store()
+    tfs = {}                        # Calculate the weights of each word in
+    for query in queries:           # each text
+        tfs[query] = expand_query(queries[query])
+    get_results(tfs)                # Get the results of the queries
+            
+    
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+#-------------------------------------------------------------------------------
+# Name:        Segment based incremental index
+# Purpose:     The index is made of small immutable segments. New documents are
+#              written in a new segment, deleted documents are only marked and a
+#              merge policy compacts the segments in the background. Queries read
+#              every live segment and the idf values and the norms of the
+#              documents come from the statistics of the whole collection. The
+#              norms are calculated when the list of segments is replaced.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Index_Writer
+from index_file import Index_Reader
+from document_store import build_store
+from array import array
+import create_index
+import resolve_queries
+import heapq
+import json
+import math
+import os
+import threading
+
+# Folder where the segments are stored
+directory = "segments"
+# Number of segments of similar size that are merged together
+merge_factor = 10
+# A segment with a higher ratio of deleted documents is rewritten
+max_deleted_ratio = 0.5
+# Number of documents added in each segment by main()
+batch_size = 200
+
+class Segment:
+    """
+    Data structure to store the data of a segment
+    """
+    def __init__(self, name, reader, deleted):
+        self.name = name          # Name of the segment files
+        self.reader = reader      # Reader of the .bin file of the segment
+        self.deleted = deleted    # Set with the ids of the deleted documents
+
+    def live_documents(self):
+        """
+        Returns the number of documents of the segment that are not deleted
+        """
+        return self.reader.documents() - len(self.deleted)
+
+    def __str__(self):
+        return self.name + " (" + str(self.live_documents()) + " documents)"
+
+class Segmented_Index:
+    """
+    Index made of immutable segments that allows adding and deleting documents
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.RLock()
+        self.pending = threading.Condition(self.lock)
+        self.merger = None
+        self.stopped = False
+        self.generation = 0
+        # The list is replaced, never modified, so a query can keep using it
+        self.segments = []
+        # Segment and id of each live document by name
+        self.locations = {}
+        # Norms of the documents of each segment of the list by name, replaced
+        # together with it
+        self.segment_norms = {}
+
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(self.path("segments.json")):
+            with open(self.path("segments.json"), "r") as file:
+                manifest = json.load(file)
+            self.generation = manifest["generation"]
+            for name in manifest["segments"]:
+                self.segments.append(self.open_segment(name))
+
+        for segment in self.segments:
+            self.add_locations(segment)
+        self.segment_norms = self.calculate_norms(self.segments)
+
+    def path(self, name):
+        """
+        Returns the path of a file of the index
+        """
+        return os.path.join(self.folder, name)
+
+    def open_segment(self, name):
+        """
+        Opens the files of a segment
+        """
+        deleted = array("I")
+        if os.path.exists(self.path(name + ".del")):
+            with open(self.path(name + ".del"), "rb") as file:
+                deleted.frombytes(file.read())
+        return Segment(name, Index_Reader(self.path(name + ".bin")), frozenset(deleted))
+
+    def add_locations(self, segment):
+        """
+        Registers the live documents of a segment
+        """
+        for doc_id in range(segment.reader.documents()):
+            if doc_id not in segment.deleted:
+                self.locations[segment.reader.doc_names[doc_id]] = (segment, doc_id)
+
+    def new_name(self):
+        """
+        Returns the name for a new segment
+        """
+        with self.lock:
+            self.generation += 1
+            return "segment_" + str(self.generation)
+
+    def save_manifest(self):
+        """
+        Saves the list of live segments. The file is replaced atomically so that
+        it always describes a complete index
+        """
+        manifest = {"generation": self.generation,
+            "segments": [segment.name for segment in self.segments]}
+        with open(self.path("segments.json.tmp"), "w") as file:
+            json.dump(manifest, file)
+        os.replace(self.path("segments.json.tmp"), self.path("segments.json"))
+
+    def save_deleted(self, segment):
+        """
+        Saves the ids of the deleted documents of a segment
+        """
+        with open(self.path(segment.name + ".del.tmp"), "wb") as file:
+            array("I", sorted(segment.deleted)).tofile(file)
+        os.replace(self.path(segment.name + ".del.tmp"), self.path(segment.name + ".del"))
+
+    def statistics(self, segments, term):
+        """
+        Returns the number of documents of the collection that contain a term
+        """
+        df = 0
+        for segment in segments:
+            position = segment.reader.find(term)
+            if position != -1:
+                df += segment.reader.dfs[position]
+        return df
+
+    def total_documents(self, segments):
+        """
+        Returns the number of documents of the collection. Deleted documents are
+        counted until they are merged away, like in their document frequencies
+        """
+        return sum(segment.reader.documents() for segment in segments)
+
+    def calculate_norms(self, segments):
+        """
+        Returns a dictionary with the norms of the documents of each segment,
+        calculated from their tf values with the idf values of the whole
+        collection. The idf values stored in a segment are the ones of the
+        collection when it was written, so the norms are calculated again every
+        time the list of segments changes
+        """
+        total = self.total_documents(segments)
+        dfs = {}
+        for segment in segments:
+            reader = segment.reader
+            for position in range(len(reader.terms)):
+                term = reader.terms[position]
+                dfs[term] = dfs.get(term, 0) + reader.dfs[position]
+
+        result = {}
+        for segment in segments:
+            reader = segment.reader
+            norms = array("d", [0.0]) * reader.documents()
+            for position in range(len(reader.terms)):
+                idf = math.log(total / dfs[reader.terms[position]], 10)
+                if idf == 0:
+                    continue
+                postings = reader.postings(position)
+                for document, tf in zip(postings.doc_ids, postings.tfs):
+                    norms[document] += math.pow(tf * idf, 2)
+            result[segment.name] = array("d", [math.sqrt(x) for x in norms])
+        return result
+
+    def prepare_segments(self, change):
+        """
+        Given a function that returns a new list of segments from the current
+        one, returns the current list, the new one and the norms of its
+        documents. The norms are calculated out of the lock, so the queries do
+        not wait for them, and the new list must only replace the current one
+        if it was not replaced meanwhile
+        """
+        with self.lock:
+            current = self.segments
+        segments = change(current)
+        return current, segments, self.calculate_norms(segments)
+
+    def add_documents(self, texts):
+        """
+        Given a dictionary with the texts, writes them in a new segment. A text
+        with the name of a live document replaces it
+        """
+        tfs = create_index.weighting_tf(texts)
+        names = list(tfs)
+        name = self.new_name()
+
+        # Terms and postings of the new segment
+        postings = {}
+        for doc_id, text in enumerate(names):
+            for word in tfs[text]:
+                postings.setdefault(word, []).append(doc_id)
+
+        segments = self.segments
+        total = self.total_documents(segments) + len(names)
+        writer = Index_Writer(self.path(name + ".bin"), names)
+        for word in sorted(postings):
+            df = self.statistics(segments, word) + len(postings[word])
+            writer.add_term(word, math.log(total / df, 10), postings[word],
+                [tfs[names[doc_id]][word] for doc_id in postings[word]])
+        writer.close()
+
+        segment = self.open_segment(name)
+        while True:
+            current, segments, norms = self.prepare_segments(
+                lambda segments: segments + [segment])
+            with self.lock:
+                if self.segments is not current:
+                    continue
+                self.segments = segments
+                self.segment_norms = norms
+                # The segment is in the manifest before the documents it
+                # replaces are deleted, so a crash between both keeps them
+                # twice instead of losing them
+                self.save_manifest()
+                for text in names:
+                    self.delete_document(text)
+                self.add_locations(segment)
+                self.pending.notify()
+                return
+
+    def delete_document(self, name):
+        """
+        Marks a document as deleted. Returns False if it is not in the index
+        """
+        with self.lock:
+            if self.locations.get(name) == None:
+                return False
+            segment, doc_id = self.locations.pop(name)
+            segment.deleted = segment.deleted | {doc_id}
+            self.save_deleted(segment)
+            self.pending.notify()
+            return True
+
+    def search(self, terms, k):
+        """
+        Given a query, returns the k texts with the highest relevance value of
+        all live segments. The idf of each term and the norms of the documents
+        are calculated from the whole collection, so the values of different
+        segments can be compared
+        """
+        with self.lock:
+            segments = self.segments
+            norms = self.segment_norms
+        total = self.total_documents(segments)
+
+        idfs = {}
+        a2 = 0
+        for term in terms:
+            df = self.statistics(segments, term)
+            if df > 0:
+                idfs[term] = math.log(total / df, 10)
+                a2 += math.pow(idfs[term] * terms[term], 2)
+        a2 = math.sqrt(a2)
+
+        heap = []
+        for segment in segments:
+            nums = {}
+            for term in idfs:
+                postings = segment.reader.get(term)
+                if postings == None:
+                    continue
+                # A * B with the weights of the query and the text
+                weight = idfs[term] * terms[term] * idfs[term]
+                for document, tf in zip(postings.doc_ids, postings.tfs):
+                    nums[document] = nums.get(document, 0) + weight * tf
+
+            for document in nums:
+                norm = norms[segment.name][document]
+                if document in segment.deleted or norm == 0:
+                    continue
+                value = nums[document] / (a2 * norm)
+                if len(heap) < k:
+                    heapq.heappush(heap, (value, segment.reader.doc_names[document]))
+                elif value > heap[0][0]:
+                    heapq.heapreplace(heap, (value, segment.reader.doc_names[document]))
+
+        results = []
+        for value, name in sorted(heap, reverse=True):
+            results.append((name, value))
+        return results
+
+    def find_merge(self):
+        """
+        Merge policy. Segments are grouped in tiers by their number of live
+        documents and merge_factor segments of the same tier are merged. A
+        segment with too many deleted documents is rewritten alone
+        """
+        tiers = {}
+        for segment in self.segments:
+            live = segment.live_documents()
+            if live < segment.reader.documents() * (1 - max_deleted_ratio):
+                return [segment]
+            tier = int(math.log(max(live, 1), merge_factor))
+            tiers.setdefault(tier, []).append(segment)
+
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= merge_factor:
+                return tiers[tier][0:merge_factor]
+        return None
+
+    def merge(self, merging):
+        """
+        Merges several segments in a new one without their deleted documents.
+        The idf values are calculated again with the current statistics of the
+        collection
+        """
+        name = self.new_name()
+        deleted = {}
+        with self.lock:
+            for segment in merging:
+                deleted[segment.name] = segment.deleted
+            # Segments added while this one is written are not counted in its
+            # idf values, which queries do not use
+            others = [segment for segment in self.segments if segment not in merging]
+
+        # New ids of the live documents
+        names = []
+        new_ids = {}
+        for segment in merging:
+            ids = array("i", [-1]) * segment.reader.documents()
+            for doc_id in range(segment.reader.documents()):
+                if doc_id not in deleted[segment.name]:
+                    ids[doc_id] = len(names)
+                    names.append(segment.reader.doc_names[doc_id])
+            new_ids[segment.name] = ids
+
+        if len(names) == 0:
+            # Every document was deleted, the segments are just dropped
+            while True:
+                current, segments, norms = self.prepare_segments(
+                    lambda segments: [segment for segment in segments
+                        if segment not in merging])
+                with self.lock:
+                    if self.segments is not current:
+                        continue
+                    self.segments = segments
+                    self.segment_norms = norms
+                    self.save_manifest()
+                    break
+            self.remove_segments(merging)
+            return
+
+        total = self.total_documents(others) + len(names)
+        writer = Index_Writer(self.path(name + ".bin"), names)
+        last = None
+        for term in heapq.merge(*[segment.reader.terms for segment in merging]):
+            if term == last:
+                continue
+            last = term
+            doc_ids = array("I")
+            tfs = array("d")
+            for segment in merging:
+                postings = segment.reader.get(term)
+                if postings == None:
+                    continue
+                ids = new_ids[segment.name]
+                for document, tf in zip(postings.doc_ids, postings.tfs):
+                    if ids[document] != -1:
+                        doc_ids.append(ids[document])
+                        tfs.append(tf)
+            if len(doc_ids) > 0:
+                df = self.statistics(others, term) + len(doc_ids)
+                writer.add_term(term, math.log(total / df, 10), doc_ids, tfs)
+        writer.close()
+
+        merged = self.open_segment(name)
+        while True:
+            current, segments, norms = self.prepare_segments(
+                lambda segments: [segment for segment in segments
+                    if segment not in merging] + [merged])
+            with self.lock:
+                if self.segments is not current:
+                    continue
+                # Documents deleted while the segment was being written
+                for segment in merging:
+                    for doc_id in segment.deleted - deleted[segment.name]:
+                        merged.deleted = merged.deleted | {new_ids[segment.name][doc_id]}
+                if len(merged.deleted) > 0:
+                    self.save_deleted(merged)
+
+                self.segments = segments
+                self.segment_norms = norms
+                self.add_locations(merged)
+                self.save_manifest()
+                break
+
+        self.remove_segments(merging)
+
+    def remove_segments(self, segments):
+        """
+        Removes the files of segments that are no longer in the index. Queries
+        that still use them keep their mapped files
+        """
+        for segment in segments:
+            os.remove(self.path(segment.name + ".bin"))
+            if os.path.exists(self.path(segment.name + ".del")):
+                os.remove(self.path(segment.name + ".del"))
+
+    def maybe_merge(self):
+        """
+        Performs one merge if the merge policy finds one. Returns if it merged
+        """
+        merging = self.find_merge()
+        if merging == None:
+            return False
+        self.merge(merging)
+        return True
+
+    def start_merging(self):
+        """
+        Starts a thread that merges segments when new segments or deletions
+        appear
+        """
+        self.stopped = False
+        self.merger = threading.Thread(target=self.merge_loop, daemon=True)
+        self.merger.start()
+
+    def merge_loop(self):
+        """
+        Body of the merging thread
+        """
+        while True:
+            # The work is checked with the lock held, so a notification sent
+            # after the check is not lost
+            with self.lock:
+                merging = self.find_merge()
+                while not self.stopped and merging == None:
+                    self.pending.wait()
+                    merging = self.find_merge()
+                if self.stopped:
+                    return
+            self.merge(merging)
+
+    def stop_merging(self):
+        """
+        Stops the merging thread once the current merge finishes
+        """
+        with self.lock:
+            self.stopped = True
+            self.pending.notify()
+        if self.merger != None:
+            self.merger.join()
+            self.merger = None
+
+def main():
+    """
+    Adds the texts of a .txt file to the segmented index in batches, merging in
+    the background, and resolves the queries from a .txt file
+    """
+    segmented = Segmented_Index(directory)
+    segmented.start_merging()
+
+    texts = create_index.load_lines("cran-1400.txt")
+    batch = {}
+    for text in texts:
+        batch[text] = texts[text]
+        if len(batch) == batch_size:
+            segmented.add_documents(batch)
+            batch = {}
+    if len(batch) > 0:
+        segmented.add_documents(batch)
+    segmented.stop_merging()
+
+    for segment in segmented.segments:
+        print(segment)
+
+    build_store("cran-1400.txt", "documents.bin")
+    resolve_queries.load_queries("cran-queries.txt")
+    resolve_queries.load_store()
+    tfs = resolve_queries.weighting_tf(resolve_queries.queries)
+    with open("result.txt", 'w') as file:
+        for query in tfs:
+            file.writelines("Query" + query + "\n")
+            for name, value in segmented.search(tfs[query], resolve_queries.k):
+                file.writelines(resolve_queries.store.text(name)[0:280] + "\n\n")
+            file.writelines("\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#-------------------------------------------------------------------------------
+# Name:        Sharded index
+# Purpose:     Resolves queries with an index split in shards of consecutive
+#              texts. Each shard is served by its own process, on this machine
+#              or on another node, and a coordinator sends every query to all
+#              of them and merges their best texts. The shards use the
+#              statistics of the whole collection, so the values are the same
+#              as with a single index.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Sections_Writer, Sections_Reader, String_Table, add_strings
+from index_file import Index_Reader
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Listener
+from collections import deque
+from itertools import islice
+from array import array
+import resolve_queries
+import bisect
+import heapq
+import math
+import os
+import time
+
+# Identifies the files written by save_collection
+MAGIC = b"WISCOL01"
+# Folder with the shards of the index
+folder = "shards"
+# Addresses (host, port) of the nodes that serve each shard. None starts a local
+# process for each shard
+nodes = None
+# Shard served by this process when it runs as a node (None runs the
+# coordinator)
+node = None
+# Key that the coordinator and the nodes share
+authkey = b"web-information-systems"
+# Maximum number of queries sent to the shards before reading their results
+window = 64
+
+def save_collection(filename, documents, terms, idfs, dfs, files, firsts):
+    """
+    Saves the statistics of the whole collection: the number of texts, the idf
+    value and number of texts of each term and the file and first text of each
+    shard
+    """
+    writer = Sections_Writer(filename, MAGIC)
+    add_strings(writer, "terms", terms)
+    writer.add_section("term_idf", array("d", idfs))
+    writer.add_section("term_df", array("I", dfs))
+    writer.meta = {"documents": documents, "terms": len(terms),
+        "shards": [[name, first] for name, first in zip(files, firsts)]}
+    writer.close()
+
+class Collection(Sections_Reader):
+    """
+    Gives access to the statistics of the whole collection of a sharded index
+    """
+    def __init__(self, filename):
+        super().__init__(filename, MAGIC)
+        self.terms = String_Table(self.section("terms"),
+            self.section("terms_offsets", "Q"))
+        self.idfs = self.section("term_idf", "d")
+        self.dfs = self.section("term_df", "I")
+        self.shards = self.meta["shards"]       # File and first text of each shard
+
+    def find(self, term):
+        """
+        Returns the position of a term in the dictionary or -1
+        """
+        position = bisect.bisect_left(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            return position
+        return -1
+
+    def idf(self, term):
+        """
+        Returns the idf value of a term or None if it is not in the collection
+        """
+        position = self.find(term)
+        if position == -1:
+            return None
+        return self.idfs[position]
+
+    def bm25_idf(self, term):
+        """
+        Returns the BM25 idf value of a term in the collection
+        """
+        df = self.dfs[self.find(term)]
+        return math.log(1 + (self.documents() - df + 0.5) / (df + 0.5))
+
+    def documents(self):
+        """
+        Returns the number of texts of the collection
+        """
+        return self.meta["documents"]
+
+    def close(self):
+        """
+        Releases the mapped file
+        """
+        self.terms = self.idfs = self.dfs = None
+        super().close()
+
+def open_shard(folder, shard):
+    """
+    Opens a shard of the index as the index of resolve_queries, with the
+    statistics of the collection
+    """
+    resolve_queries.statistics = Collection(os.path.join(folder, "collection.bin"))
+    filename = resolve_queries.statistics.shards[shard][0]
+    resolve_queries.index = Index_Reader(os.path.join(folder, filename))
+
+def handle(connection):
+    """
+    Resolves the queries received through a connection until it is closed. The
+    errors are sent back instead of the results
+    """
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request == None:
+            break
+        terms, k, method, retrieval = request
+        resolve_queries.retrieval = retrieval
+        try:
+            connection.send(resolve_queries.resolve(terms, k, method))
+        except Exception as error:
+            connection.send(error)
+
+def serve_process(folder, shard, connection):
+    """
+    Serves a shard to the coordinator that started this process
+    """
+    open_shard(folder, shard)
+    handle(connection)
+    connection.close()
+
+def serve_node(folder, shard, address):
+    """
+    Serves a shard to the coordinators that connect to an address, one at a
+    time
+    """
+    open_shard(folder, shard)
+    with Listener(address, authkey=authkey) as listener:
+        print("Serving shard " + str(shard) + " on " + str(address))
+        while True:
+            with listener.accept() as connection:
+                handle(connection)
+
+class Coordinator:
+    """
+    Sends the queries to the processes that serve the shards and merges their
+    results
+    """
+    def __init__(self, folder, nodes=None):
+        collection = Collection(os.path.join(folder, "collection.bin"))
+        count = len(collection.shards)
+        collection.close()
+
+        self.connections = []       # Connection with each shard
+        self.processes = []         # Local processes
+        for shard in range(count):
+            if nodes == None:
+                connection, child = Pipe()
+                process = Process(target=serve_process, args=(folder, shard, child),
+                    daemon=True)
+                process.start()
+                child.close()
+                self.processes.append(process)
+            else:
+                connection = Client(tuple(nodes[shard]), authkey=authkey)
+            self.connections.append(connection)
+
+    def search(self, terms, k, method=None):
+        """
+        Given the weights of the terms of a query, returns the k texts with the
+        highest relevance value
+        """
+        return self.search_many([terms], k, method)[0]
+
+    def search_many(self, queries, k, method=None):
+        """
+        Given the weights of the terms of several queries, returns for each one
+        the k texts with the highest relevance value. Up to window queries are
+        sent before reading results, so every shard is always busy
+        """
+        if method == None:
+            method = resolve_queries.scoring
+        results = [None] * len(queries)
+        pending = deque()
+        try:
+            for i, terms in enumerate(queries):
+                for connection in self.connections:
+                    connection.send((terms, k, method, resolve_queries.retrieval))
+                pending.append(i)
+                if len(pending) >= window:
+                    i = pending.popleft()
+                    results[i] = self.gather(k)
+            while pending:
+                i = pending.popleft()
+                results[i] = self.gather(k)
+        except Exception:
+            # The replies of the queries that were sent are read anyway, so
+            # the next queries get their own
+            for i in pending:
+                try:
+                    self.gather(k)
+                except Exception:
+                    pass
+            raise
+        return results
+
+    def gather(self, k):
+        """
+        Reads the results of the oldest query from every shard and merges them.
+        On equal values the texts of the first shards, which have the lowest
+        ids, go first as in a single index. If a shard failed, its exception
+        is raised after reading the results of all of them
+        """
+        parts = []
+        error = None
+        for connection in self.connections:
+            part = connection.recv()
+            if isinstance(part, Exception) and error == None:
+                error = part
+            parts.append(part)
+        if error != None:
+            raise error
+        return list(islice(heapq.merge(*parts, key=lambda x: -x[1]), k))
+
+    def close(self):
+        """
+        Stops the local processes and closes the connections
+        """
+        for connection in self.connections:
+            if self.processes:
+                connection.send(None)
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+def main():
+    """
+    Serves a shard if this process is a node. Otherwise resolves the queries
+    from a .txt file with the sharded index and saves the results in a .txt
+    file
+    """
+    if node != None:
+        serve_node(folder, node, tuple(nodes[node]))
+        return
+
+    resolve_queries.load_queries("cran-queries.txt")
+    resolve_queries.load_store()
+    tfs = resolve_queries.weighting_tf(resolve_queries.queries)
+    coordinator = Coordinator(folder, nodes)
+    try:
+        start = time.perf_counter()
+        results = coordinator.search_many(list(tfs.values()), resolve_queries.k)
+        elapsed = time.perf_counter() - start
+    finally:
+        coordinator.close()
+    print("{0:.1f} queries per second".format(len(tfs) / elapsed))
+
+    with open("result.txt", 'w') as file:
+        for query, ids in zip(tfs, results):
+            file.writelines("Query" + query + "\n")
+            for name, value in ids:
+                file.writelines(resolve_queries.store.text(name)[0:280] + "\n\n")
+            file.writelines("\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#-------------------------------------------------------------------------------
+# Name:        External memory index construction (SPIMI)
+# Purpose:     Builds the same index as create_index for collections that do not
+#              fit in memory. The texts are read one by one, inverted in blocks
+#              that fit in a memory budget, the blocks are saved as sorted runs
+#              and the runs are merged into the final index.
+#
+# Author:      Sergio Murillo
+#
+# Created:     17/10/2026
+#-------------------------------------------------------------------------------
+
+from index_file import Index_Writer
+from document_store import build_store
+import create_index
+from array import array
+import heapq
+import math
+import os
+import struct
+import tempfile
+
+# Approximate memory (bytes) that a block can use before it is saved as a run
+memory_budget = 64 * 1024 * 1024
+# Estimated memory of each posting (doc id and tf), of each position and of
+# each term of a block
+posting_bytes = 12
+position_bytes = 4
+term_bytes = 250
+# Maximum number of runs merged at the same time
+merge_fan_in = 64
+
+# Header of a term in a run: length of the term, number of postings and number
+# of positions (0 if they are not saved)
+TERM = struct.Struct("<III")
+
+def read_texts(filename):
+    """
+    Given a .txt file yields the identifier and the text of each of its lines
+    without loading the whole file
+    """
+    with open(filename, 'r') as file:
+        for line in file:
+            line = line.rstrip()
+            if line == "":
+                continue
+            separator = line.split(' ', 1)
+            if len(separator) > 1:
+                yield separator[0], separator[1]
+            else:
+                yield separator[0], ""
+
+def write_run(filename, block):
+    """
+    Saves the postings of a block sorted by term in a run file
+    """
+    with open(filename, "wb") as file:
+        for term in sorted(block):
+            write_term(file, term, *block[term])
+
+def write_term(file, term, doc_ids, tfs, counts, places):
+    """
+    Writes a term with its postings in a run file. counts is the number of
+    positions of the term in each document and places all of them in order,
+    both empty if the positions are not saved
+    """
+    encoded = term.encode("utf-8")
+    file.write(TERM.pack(len(encoded), len(doc_ids), len(places)))
+    file.write(encoded)
+    doc_ids.tofile(file)
+    tfs.tofile(file)
+    if len(places) > 0:
+        counts.tofile(file)
+        places.tofile(file)
+
+def read_run(filename):
+    """
+    Yields the terms of a run file in order with their postings
+    """
+    with open(filename, "rb") as file:
+        while True:
+            header = file.read(TERM.size)
+            if len(header) < TERM.size:
+                return
+            length, count, total = TERM.unpack(header)
+            term = str(file.read(length), "utf-8")
+            doc_ids = array("I")
+            tfs = array("d")
+            counts = array("I")
+            places = array("I")
+            doc_ids.fromfile(file, count)
+            tfs.fromfile(file, count)
+            if total > 0:
+                counts.fromfile(file, count)
+                places.fromfile(file, total)
+            yield term, doc_ids, tfs, counts, places
+
+def merge_runs(runs):
+    """
+    Yields each term of several runs with all its postings and positions. The
+    runs hold consecutive documents, so joining them in order keeps the ids
+    sorted
+    """
+    streams = [read_run(run) for run in runs]
+    last = None
+    doc_ids = tfs = counts = places = None
+    # On equal terms heapq.merge keeps the order of the runs
+    for term, run_ids, run_tfs, run_counts, run_places in heapq.merge(*streams,
+            key=lambda x: x[0]):
+        if term != last:
+            if last != None:
+                yield last, doc_ids, tfs, counts, places
+            last = term
+            doc_ids = array("I")
+            tfs = array("d")
+            counts = array("I")
+            places = array("I")
+        doc_ids.extend(run_ids)
+        tfs.extend(run_tfs)
+        counts.extend(run_counts)
+        places.extend(run_places)
+    if last != None:
+        yield last, doc_ids, tfs, counts, places
+
+def invert_blocks(texts, folder):
+    """
+    Inverts the texts in blocks that fit in the memory budget and saves each
+    block as a run. Returns the names of the texts, their number of words and
+    of different words and the list of runs
+    """
+    doc_names = []
+    lengths = array("I")
+    vocabularies = array("I")
+    runs = []
+    block = {}
+    used = 0
+    for name, text in texts:
+        doc_id = len(doc_names)
+        doc_names.append(name)
+        tfs = create_index.weighting_tf({name: text})[name]
+        length, vocabulary = create_index.saved_lengths.pop(name)
+        text_positions = create_index.saved_positions.pop(name, None)
+        lengths.append(length)
+        vocabularies.append(vocabulary)
+        for word in tfs:
+            if block.get(word) == None:
+                block[word] = (array("I"), array("d"), array("I"), array("I"))
+                used += term_bytes
+            block[word][0].append(doc_id)
+            block[word][1].append(tfs[word])
+            used += posting_bytes
+            if text_positions != None:
+                block[word][2].append(len(text_positions[word]))
+                block[word][3].extend(text_positions[word])
+                used += position_bytes * len(text_positions[word])
+
+        if used >= memory_budget:
+            runs.append(os.path.join(folder, "run_" + str(len(runs))))
+            write_run(runs[-1], block)
+            block = {}
+            used = 0
+
+    if len(block) > 0:
+        runs.append(os.path.join(folder, "run_" + str(len(runs))))
+        write_run(runs[-1], block)
+
+    return doc_names, lengths, vocabularies, runs
+
+def reduce_runs(runs, folder):
+    """
+    Merges groups of consecutive runs until there are at most merge_fan_in, so
+    the number of open files is bounded
+    """
+    level = 0
+    while len(runs) > merge_fan_in:
+        merged = []
+        for i in range(0, len(runs), merge_fan_in):
+            name = os.path.join(folder, "merge_" + str(level) + "_" + str(i))
+            with open(name, "wb") as file:
+                for postings in merge_runs(runs[i:i + merge_fan_in]):
+                    write_term(file, *postings)
+            for run in runs[i:i + merge_fan_in]:
+                os.remove(run)
+            merged.append(name)
+        runs = merged
+        level += 1
+    return runs
+
+def build_index(texts, filename):
+    """
+    Given an iterator over the identifiers and texts of a collection, builds the
+    index and saves it in a .bin file
+    """
+    folder = tempfile.mkdtemp(prefix="runs_", dir=".")
+    try:
+        doc_names, lengths, vocabularies, runs = invert_blocks(texts, folder)
+        runs = reduce_runs(runs, folder)
+
+        doc_lengths = None
+        if create_index.bm25:
+            doc_lengths = lengths
+        writer = Index_Writer(filename, doc_names, create_index.codec,
+            doc_lengths=doc_lengths)
+        for term, doc_ids, tfs, counts, places in merge_runs(runs):
+            idf = math.log(len(doc_names) / len(doc_ids), 10)
+            if (idf != 0):
+                term_positions = None
+                if len(places) > 0:
+                    term_positions = []
+                    start = 0
+                    for count in counts:
+                        term_positions.append(places[start:start + count])
+                        start += count
+                counts = None
+                if create_index.bm25:
+                    counts = [round(tf * vocabularies[doc_id])
+                        for doc_id, tf in zip(doc_ids, tfs)]
+                writer.add_term(term, idf, doc_ids, tfs, term_positions, counts)
+            else:
+                writer.add_common_term(term)
+        writer.close()
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+
+def main():
+    """
+    Creates an index from a .txt file and saves it to a .bin file
+    """
+    build_index(read_texts("cran-1400.txt"), "index.bin")
+    build_store("cran-1400.txt", "documents.bin")
+
+if __name__ == '__main__':
+    main()
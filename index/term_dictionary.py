@@ -0,0 +1,101 @@
+#-------------------------------------------------------------------------------
+# Name:        Term dictionary lookups
+# Purpose:     Finds the terms of a sorted dictionary (the terms of the index)
+#              that start with a prefix, match a wildcard pattern or are within
+#              an edit distance of a word. The dictionary is searched by
+#              bisection, as an implicit trie, so only the terms that can match
+#              are read.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import bisect
+import fnmatch
+import re
+
+def successor(prefix):
+    """
+    Returns the lowest string that is higher than every string that starts with
+    prefix
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def prefix_range(terms, prefix, low=0):
+    """
+    Given a sorted sequence of terms returns the first and the last + 1
+    positions of the terms that start with prefix
+    """
+    start = bisect.bisect_left(terms, prefix, low)
+    if prefix == "":
+        return start, len(terms)
+    return start, bisect.bisect_left(terms, successor(prefix), start)
+
+def prefix_terms(terms, prefix):
+    """
+    Returns the terms that start with prefix, in order
+    """
+    start, end = prefix_range(terms, prefix)
+    return [terms[i] for i in range(start, end)]
+
+def wildcard_terms(terms, pattern):
+    """
+    Returns the terms that match a pattern where * is any sequence of characters
+    and ? is any character. Only the terms that start with the part before the
+    first wildcard are read, so patterns that start with one read them all
+    """
+    prefix = re.split(r"[*?]", pattern, 1)[0]
+    start, end = prefix_range(terms, prefix)
+    if prefix == pattern:
+        return [pattern] if start < end and terms[start] == pattern else []
+    regex = re.compile(fnmatch.translate(pattern))
+    return [terms[i] for i in range(start, end) if regex.match(terms[i])]
+
+def next_row(row, word, character):
+    """
+    Given the edit distances between a prefix and every prefix of word, returns
+    them for the prefix followed by character
+    """
+    result = [row[0] + 1]
+    for i in range(1, len(row)):
+        cost = 0 if word[i - 1] == character else 1
+        result.append(min(result[i - 1] + 1, row[i] + 1, row[i - 1] + cost))
+    return result
+
+def fuzzy_terms(terms, word, distance):
+    """
+    Returns the terms within an edit distance (Levenshtein) of word, sorted by
+    distance. Consecutive terms share the rows of their common prefix, and when
+    no extension of a prefix can be within the distance all the terms that
+    start with it are skipped, as in a trie
+    """
+    results = []
+    rows = [list(range(len(word) + 1))]
+    previous = ""
+    position = 0
+    while position < len(terms):
+        term = terms[position]
+        common = 0
+        limit = min(len(previous), len(term))
+        while common < limit and previous[common] == term[common]:
+            common += 1
+        del rows[common + 1:]
+
+        skipped = False
+        for i in range(common, len(term)):
+            rows.append(next_row(rows[-1], word, term[i]))
+            if min(rows[-1]) > distance:
+                previous = term[:i + 1]
+                position = prefix_range(terms, previous, position)[1]
+                skipped = True
+                break
+        if skipped:
+            continue
+
+        if rows[-1][-1] <= distance:
+            results.append((rows[-1][-1], term))
+        previous = term
+        position += 1
+
+    return [term for value, term in sorted(results)]
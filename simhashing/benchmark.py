@@ -0,0 +1,86 @@
+#-------------------------------------------------------------------------------
+# Name:        Benchmark of the fingerprints
+# Purpose:     Calculates the "minimum" fingerprints of the texts of
+#              articles_2500.train with each engine of simhashing and reports
+#              the time, the speedup with respect to the PriorityQueue engine
+#              and the duplicates found. It also checks that the "compat" engine
+#              gives the same fingerprints as the "queue" engine.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+import simhashing
+import json
+import time
+
+# Documents, expected duplicates and stop words
+texts_file = "articles_2500.train"
+truth_file = "articles_2500.truth"
+stop_words_file = "stop-words.txt"
+# Engines, ways of processing the texts and restrictiveness values to measure
+engines = ["queue", "compat", "vectorized"]
+processings = ["tokenization", "trigram"]
+restrictiveness_values = [4]
+# Times each measure is repeated (the fastest one is reported)
+repeat = 3
+# File where the report is saved
+report_file = "benchmark.json"
+
+def benchmark_engine(terms, engine):
+    """
+    Calculates the fingerprints of every text with an engine. Returns the
+    fingerprints and the fastest time
+    """
+    simhashing.engine = engine
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        hashes = simhashing.minimum_hashes(terms)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None else min(best, elapsed)
+    return hashes, best
+
+def main():
+    """
+    Runs the benchmark and saves the report in a .json file
+    """
+    texts = simhashing.load_lines(texts_file)
+    expected = simhashing.load_results(truth_file)
+    simhashing.load_stop_words(stop_words_file)
+
+    report = []
+    print("{0:<14} {1:>3} {2:<12} {3:>9} {4:>8} {5:>6} {6:>6}".format(
+        "processing", "r", "engine", "seconds", "speedup", "found", "extra"))
+    for processing in processings:
+        simhashing.processing = processing
+        terms = simhashing.document_terms(texts)
+        for restrictiveness in restrictiveness_values:
+            simhashing.restrictiveness = restrictiveness
+            fingerprints = {}
+            times = {}
+            for engine in engines:
+                fingerprints[engine], times[engine] = benchmark_engine(terms, engine)
+                found = simhashing.equal_duplicates(fingerprints[engine])
+                good = sum(1 for pair in found if pair in expected)
+                result = {"processing": processing, "restrictiveness": restrictiveness,
+                    "engine": engine, "seconds": times[engine], "found": good,
+                    "extra": len(found) - good}
+                if times.get("queue"):
+                    result["speedup"] = times["queue"] / times[engine]
+                report.append(result)
+                print("{0:<14} {1:>3} {2:<12} {3:>9.3f} {4:>8} {5:>6} {6:>6}".format(
+                    processing, restrictiveness, engine, times[engine],
+                    "{0:.1f}x".format(result["speedup"]) if "speedup" in result else "-",
+                    str(good) + "/" + str(len(expected)), len(found) - good))
+            if "queue" in fingerprints and "compat" in fingerprints:
+                if fingerprints["queue"] != fingerprints["compat"]:
+                    raise Exception("The compat engine does not give the same fingerprints")
+                print("\t- compat fingerprints are identical to queue")
+
+    with open(report_file, 'w') as file:
+        json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()
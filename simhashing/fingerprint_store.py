@@ -0,0 +1,266 @@
+#-------------------------------------------------------------------------------
+# Name:        Fingerprint store
+# Purpose:     Keeps the Charikar fingerprints of the documents in an
+#              append-only file, mapped in memory, with an index of buckets
+#              for each permuted table. A new document is checked against the
+#              stored ones and added in one call, so documents can be ingested
+#              continuously without hashing the collection again.
+#
+# Author:      Sergio Murillo
+#
+# Created:     18/10/2026
+#-------------------------------------------------------------------------------
+
+from itertools import combinations
+import numpy as np
+import simhashing
+import mmap
+import os
+import struct
+import time
+
+# Identifies the files of Fingerprint_Store
+MAGIC = b"SIMFPS01"
+# Magic, distance, blocks, bucket bits, name size and number of documents
+HEADER = struct.Struct("<8sIIIIQ")
+# File of the store
+store_file = "fingerprints.bin"
+# Bits of the bucket of a key, so each table has 2^bucket_bits buckets
+bucket_bits = 16
+# Maximum number of bytes of the name of a document
+name_size = 32
+# Documents for which there is space when the store is created. When it is
+# full the space is doubled
+initial_capacity = 1024
+
+class Fingerprint_Store:
+    """
+    Append-only store of 64-bit fingerprints. The file has a header, the first
+    document of each bucket of each permuted table and the documents, each one
+    with its fingerprint, the next document of its bucket in each table and its
+    name. A document is linked at the head of its buckets, so they are chains
+    from the newest to the oldest document, and the number of documents in the
+    header is written last. If an addition was interrupted before that, the
+    heads that point to its document are moved back when the store is opened
+    """
+    def __init__(self, filename, distance=None, blocks=None):
+        if not os.path.exists(filename):
+            self.create(filename, simhashing.hamming_distance if distance == None
+                else distance, simhashing.blocks if blocks == None else blocks)
+        self.file = open(filename, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, self.distance, self.blocks, self.bucket_bits, self.name_size, \
+            self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise Exception("Invalid fingerprint store")
+        if distance != None and distance != self.distance:
+            raise Exception("The store was created with another distance")
+
+        # First bit and size of each block, as in Permuted_Tables
+        self.bounds = [(i * 64 // self.blocks,
+            (i + 1) * 64 // self.blocks - i * 64 // self.blocks)
+            for i in range(self.blocks)]
+        self.tables = list(combinations(range(self.blocks), self.blocks - self.distance))
+        self.buckets = 1 << self.bucket_bits
+        self.mask = self.buckets - 1
+        self.record = struct.Struct("<Q" + str(len(self.tables)) + "I" +
+            str(self.name_size) + "s")
+        self.start = HEADER.size + len(self.tables) * self.buckets * 4
+        self.capacity = (len(self.map) - self.start) // self.record.size
+        self.repair()
+
+    def repair(self):
+        """
+        Moves back the heads of the buckets that point to documents that were
+        not stored completely, so they point to the first stored document of
+        their chains
+        """
+        heads = np.frombuffer(self.map, dtype="<u4",
+            count=len(self.tables) * self.buckets, offset=HEADER.size)
+        broken = np.flatnonzero(heads > self.count).tolist()
+        del heads
+        for position in broken:
+            table, bucket = divmod(position, self.buckets)
+            struct.pack_into("<I", self.map, HEADER.size + position * 4,
+                self.stored(table, self.head(table, bucket)))
+
+    @staticmethod
+    def create(filename, distance, blocks):
+        """
+        Creates an empty store
+        """
+        if blocks <= distance:
+            raise Exception("There must be more blocks than the distance")
+        tables = len(list(combinations(range(blocks), blocks - distance)))
+        record = 8 + tables * 4 + name_size
+        with open(filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC, distance, blocks, bucket_bits, name_size, 0))
+            file.truncate(HEADER.size + tables * (1 << bucket_bits) * 4 +
+                initial_capacity * record)
+
+    def __len__(self):
+        return self.count
+
+    def keys(self, fingerprint):
+        """
+        Returns the bucket of a fingerprint in each table: the lowest bits of
+        the chosen blocks together
+        """
+        result = []
+        for chosen in self.tables:
+            key = 0
+            for block in chosen:
+                start, size = self.bounds[block]
+                key = (key << size) | ((fingerprint >> start) & ((1 << size) - 1))
+            result.append(key & self.mask)
+        return result
+
+    def head(self, table, bucket):
+        """
+        Returns the newest document + 1 of a bucket of a table (0 if empty)
+        """
+        return struct.unpack_from("<I", self.map,
+            HEADER.size + (table * self.buckets + bucket) * 4)[0]
+
+    def next(self, table, document):
+        """
+        Returns the next document + 1 of the chain of a document in a table
+        """
+        return struct.unpack_from("<I", self.map, self.start +
+            document * self.record.size + 8 + table * 4)[0]
+
+    def stored(self, table, head):
+        """
+        Given a document + 1 of a chain of a table, returns the first one of
+        the chain from it that is stored (0 if none). The documents of an
+        interrupted addition were written before the heads, so their links are
+        valid and point to older documents
+        """
+        while head > self.count:
+            head = self.next(table, head - 1)
+        return head
+
+    def fingerprint(self, document):
+        """
+        Returns the fingerprint of a document
+        """
+        return struct.unpack_from("<Q", self.map,
+            self.start + document * self.record.size)[0]
+
+    def name(self, document):
+        """
+        Returns the name of a document
+        """
+        return self.record.unpack_from(self.map,
+            self.start + document * self.record.size)[-1].rstrip(b"\0").decode("utf-8")
+
+    def search(self, fingerprint):
+        """
+        Returns the stored documents whose fingerprints differ in up to distance
+        bits from a fingerprint, in order. Only the chains of its buckets are
+        read
+        """
+        result = set()
+        for table, bucket in enumerate(self.keys(fingerprint)):
+            document = self.stored(table, self.head(table, bucket)) - 1
+            visited = set()
+            # The chains go to older documents, so a document that is not
+            # stored or already visited means the file is damaged
+            while 0 <= document < self.count and document not in visited:
+                visited.add(document)
+                if document not in result and \
+                        (self.fingerprint(document) ^ fingerprint).bit_count() <= self.distance:
+                    result.add(document)
+                document = self.next(table, document) - 1
+        return sorted(result)
+
+    def add(self, name, fingerprint):
+        """
+        Appends a document and links it at the head of its buckets. Returns
+        its number
+        """
+        encoded = name.encode("utf-8")
+        if len(encoded) > self.name_size:
+            raise Exception("The name " + name + " is too long")
+        if self.count == self.capacity:
+            self.capacity *= 2
+            self.map.resize(self.start + self.capacity * self.record.size)
+
+        document = self.count
+        keys = self.keys(fingerprint)
+        nexts = [self.stored(table, self.head(table, bucket))
+            for table, bucket in enumerate(keys)]
+        self.record.pack_into(self.map, self.start + document * self.record.size,
+            fingerprint, *nexts, encoded)
+        for table, bucket in enumerate(keys):
+            struct.pack_into("<I", self.map,
+                HEADER.size + (table * self.buckets + bucket) * 4, document + 1)
+        self.count += 1
+        struct.pack_into("<Q", self.map, HEADER.size - 8, self.count)
+        return document
+
+    def check_and_add(self, name, fingerprint):
+        """
+        Returns the names of the stored near-duplicates of a document and adds
+        it to the store
+        """
+        result = [self.name(document) for document in self.search(fingerprint)]
+        self.add(name, fingerprint)
+        return result
+
+    def check_and_add_document(self, name, text):
+        """
+        Given a new document, returns the names of its stored near-duplicates
+        and adds its fingerprint to the store
+        """
+        return self.check_and_add(name, document_fingerprint(name, text))
+
+    def close(self):
+        """
+        Writes the changes and closes the file
+        """
+        self.map.flush()
+        self.map.close()
+        self.file.close()
+
+def document_fingerprint(name, text):
+    """
+    Returns the Charikar fingerprint of a document, with the processing of
+    simhashing
+    """
+    terms = simhashing.document_terms({name: text})
+    return simhashing.charikar_hash(terms.get(name))
+
+def main():
+    """
+    Adds the documents of "articles_2500.train" that are not in the store yet,
+    reporting the near-duplicates of each one
+    """
+    if simhashing.processing == "tokenization":
+        simhashing.load_stop_words("stop-words.txt")
+    simhashing.expected_duplicates = simhashing.load_results("articles_2500.truth")
+
+    store = Fingerprint_Store(store_file)
+    compare_results = []
+    times = []
+    try:
+        for position, (name, text) in enumerate(simhashing.read_documents(
+                "articles_2500.train")):
+            # The documents are appended in order, so the first ones are stored
+            if position < len(store):
+                continue
+            start = time.perf_counter()
+            duplicates = store.check_and_add_document(name, text)
+            times.append(time.perf_counter() - start)
+            for other in duplicates:
+                compare_results.extend(simhashing.pair_names([name, other], [(0, 1)]))
+    finally:
+        store.close()
+
+    print(len(times), "documents added,", len(compare_results), "near-duplicates found")
+    if len(times) > 0:
+        print("{0:.3f} ms per document".format(sum(times) / len(times) * 1000))
+        simhashing.check_results(compare_results)
+
+if __name__ == '__main__':
+    main()
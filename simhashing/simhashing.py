@@ -1,246 +1,752 @@
-#-------------------------------------------------------------------------------
-# Name:        Detection of quasi-duplicate documents
-# Purpose:     Example of the use of simhasing for the detection of duplicate 
-#              documents within a collection.
-#
-# Author:      Sergio Murillo
-#
-# Created:     14/10/2022
-#-------------------------------------------------------------------------------
-
-from textblob import TextBlob
-from queue import PriorityQueue
-import hashlib
-
-# Auxiliary list for stop words
-stop_words = set()
-# Auxiliary list for expects duplicates
-expected_duplicates = []
-# Restrictive value (> 0)
-restrictiveness = 4
-# Text processing:
-#   - Use "trigram" to calculate hashes on text trigrams
-#   - Use "tokenization" to compute hashes on text tokens
-processing = "tokenization"
-
-def string_to_bag_of_words(text):
-    """
-    Given a list of texts returns a dictionary with the identifier of a text/
-    query and the set of its terms with their frequency
-    """
-    global stop_words
-    bow = {}
-
-    for line in text:
-        blob = TextBlob(text.get(line))
-        tokens = blob.words
-        aux = {}
-        for token in tokens:
-            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
-            token = token.stem()
-            # Check that the token is not an empty word
-            if token not in stop_words:
-                if aux.get(token) == None:
-                    aux[token] = 1
-                else:
-                    aux[token] += 1
-        bow[line] = aux
-
-    return bow
-
-def string_to_trigrams(text):
-    """
-    Given a text returns a list with its trigrams
-    """
-    bot = {}
-    for line in text:
-        list_of_trigram = []
-        # Divide the text of each line into words and convert them to lowercase.
-        clean_line = text.get(line).lower().strip("\n").split(" ")
-        # For each word in the line, create a list of trigrams
-        for i in range(0, len(clean_line) - 3):
-            trigram = clean_line[i] + clean_line[i + 1] + clean_line[i + 2]
-            list_of_trigram.append(trigram)
-        bot[line] = list_of_trigram
-  
-    return bot    
-
-def load_stop_words(filename):
-    """
-    Loads a list of stop words from a .txt file. To be used auxiliary in the
-    string_to_bag_of_words function
-    """
-    global stop_words
-
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            line = line.strip("\n ")
-            stop_words.add(line)
-
-def load_lines(filename):
-    """
-    Given a .txt file returns a list with the contents of each of its lines
-    """
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        lines = [line.rstrip() for line in lines]
-
-    d = {}
-    for line in lines:
-        separator = line.split(' ')
-        result = ''
-        for i in range(1, len(separator)):
-            result += separator[i] + " "
-        d[separator[0]] = result
-    return d
-
-def split_item_to_set(item):
-    """
-    Given the terms in a dictionary adds them to a set
-    """
-    result = set()
-    for word in item:
-        result.add(word)
-
-    return result
-
-def sim_hash(item, restrictiveness, processing):
-    """
-    Given a set, a restrictiveness and how to process the text, calculates its
-    hash and returns it
-    """
-    if processing == "trigram":
-        return sim_hash_trigram(item, restrictiveness)
-    elif processing == "tokenization":
-        return sim_hash_tokenization(item, restrictiveness)
-    else:
-        raise Exception("Invalid processing")
-    
-def sim_hash_trigram(item, restrictiveness):
-    """
-    Calculates the hash using the trigrams of a text
-    """
-    queue = PriorityQueue()
-    for trigram in item:
-        queue.put(hashlib.sha224(trigram.encode("utf-8")).hexdigest())
-        simhash = 0
-    for x in range(0, restrictiveness):
-        simhash ^= int(queue.get(), base = 16)
-    return simhash
-
-def sim_hash_tokenization(item, restrictiveness):
-    """
-    Calculates the hash using the tokens of a text
-    """
-    result = split_item_to_set(item)
-    queue = PriorityQueue()
-    for x in result:
-        queue.put(hashlib.sha224(x.encode("utf-8")).hexdigest())
-        simhash = 0
-    for x in range(0, restrictiveness):
-        simhash ^= int(queue.get(), base = 16)
-    return simhash
-
-def check_results(compare_results):
-    """
-    Check the results I get with those expected in the file "articles_2500.truth"
-    """
-    global expected_duplicates
-    global processing
-    long = len(expected_duplicates)
-
-    good_counter = 0
-    bad_counter = 0
-    for result in compare_results:
-        if result in expected_duplicates:
-            good_counter += 1
-        else:
-            bad_counter += 1
-    print("{0:.2f}".format(good_counter  / long * 100) + "% effectiveness using", 
-        processing, "with a restrictiveness of", restrictiveness)
-    print("\t-", bad_counter, "more duplicates found than expected")
-    print("\t-", long - good_counter, "less duplicates found than expected")
-
-def load_results(filename):
-    """
-    Stores the expected results of the file "articles_2500.truth"
-    """
-    result = []
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            line = line.strip()
-            line = line.split(" ")
-            first = line[0]
-            second = line[1]
-            first_n = int(first[1:])
-            second_n = int(second[1:])
-            if (first_n < second_n):
-                result.append(first + " " + second)
-            else:
-                result.append(second + " " + first)
-    return result
-
-def save_results(results):
-    """
-    Saves the results in a file
-    """
-    with open("results.txt", 'w') as file:
-        file.write("Duplicates found using " +
-        processing + " with a restrictiveness of " + str(restrictiveness) + "\n")
-        for result in results:
-            file.write(result + "\n")
-
-def main():
-    """
-    Find quasi-duplicate documents
-    """
-    global expected_duplicates
-    global restrictiveness
-    global processing
-    # Load the documents
-    texts = load_lines("articles_2500.train")
-
-    # Load the expected duplicates
-    expected_duplicates = load_results("articles_2500.truth")
-
-    # Choose a way to process the texts (trigrams or tokenization).
-    if(processing == "trigram"):
-        # Get the trigrams of the documents
-        terms = string_to_trigrams(texts)
-    elif(processing == "tokenization"):
-        # Load the stop words
-        load_stop_words("stop-words.txt")
-        # Get the bag of words of the documents
-        terms = string_to_bag_of_words(texts)
-    else:
-        raise Exception("Invalid processing")
-
-    # Dictionary in which we store duplicate texts
-    repeated = {}
-    compare_results = []
-    for item in terms:
-        actual_hash = (sim_hash(terms.get(item), restrictiveness, processing))
-        # If the hash does not exist, a new entry is created with the current text
-        if (repeated.get(actual_hash) == None):
-            repeated[actual_hash] = item
-        # If the hash exists, the entry is modified by adding the index of the
-        # new text
-        else:
-            earlier = repeated[actual_hash]
-            repeated[actual_hash] = str(earlier) + " " + str(item)
-
-    # We go through the dictionary
-    for key in repeated:
-        result = repeated.get(key).split(" ")
-        # If an entry has more than one result, it means that there are repeated
-        # texts.
-        if len(result) > 1:
-            compare_results.append(repeated.get(key))
-    
-    save_results(compare_results)
-    check_results(compare_results)
-
-if __name__ == '__main__':
-    main()
+#-------------------------------------------------------------------------------
+# Name:        Detection of quasi-duplicate documents
+# Purpose:     Example of the use of simhasing for the detection of duplicate 
+#              documents within a collection.
+#
+# Author:      Sergio Murillo
+#
+# Created:     14/10/2022
+#-------------------------------------------------------------------------------
+
+from textblob import TextBlob
+from queue import PriorityQueue
+from itertools import combinations, islice
+from multiprocessing import Pool
+from collections import deque
+import numpy as np
+import hashlib
+import heapq
+import os
+
+# Auxiliary list for stop words
+stop_words = set()
+# Auxiliary list for expects duplicates
+expected_duplicates = []
+# Restrictive value (> 0)
+restrictiveness = 4
+# Text processing:
+#   - Use "trigram" to calculate hashes on text trigrams
+#   - Use "tokenization" to compute hashes on text tokens
+processing = "tokenization"
+# Fingerprint of the texts:
+#   - Use "charikar" to weight each of the 64 bits with the hashes of the terms
+#     and find the texts whose fingerprints differ in up to hamming_distance
+#     bits
+#   - Use "minhash" to find the texts whose MinHash signatures share a band
+#     of the LSH index and whose Jaccard value is at least jaccard_threshold
+#   - Use "minimum" to XOR the restrictiveness lowest hashes of the terms and
+#     find the texts with the same fingerprint
+fingerprint = "charikar"
+# Calculation of the "minimum" fingerprints:
+#   - Use "compat" to obtain the same fingerprints as "queue", faster
+#   - Use "vectorized" to hash the different terms of a batch of texts with a
+#     64-bit FNV-1a hash in NumPy arrays and XOR the restrictiveness lowest
+#     hashes of each text. The fingerprints are different, so are the
+#     duplicates found
+#   - Use "queue" to sort the SHA-224 hashes of each text in a PriorityQueue
+engine = "compat"
+# Number of terms hashed at once by the "vectorized" engine
+batch_size = 4096
+# Maximum number of different bits of two near-duplicate fingerprints
+hamming_distance = 3
+# Blocks in which the fingerprints are split for the permuted tables (more
+# than hamming_distance). There is a table for each choice of
+# blocks - hamming_distance blocks, which form its key
+blocks = 6
+# MinHash signatures:
+#   - Use "k_permutation" to keep the lowest value of each of signature_size
+#     hash functions
+#   - Use "one_permutation" to hash once and keep the lowest value of each of
+#     signature_size bins (empty bins are filled from the next one)
+minhash_scheme = "k_permutation"
+signature_size = 128
+# Values of each band of the LSH index (it must divide signature_size). More
+# rows give fewer candidates, with a higher Jaccard value
+rows_per_band = 4
+# Check of the candidate pairs:
+#   - Use "exact" to calculate the Jaccard value of their terms
+#   - Use "estimate" to estimate it from their signatures
+#   - Use "none" to accept every candidate
+verification = "exact"
+jaccard_threshold = 0.5
+# Seed of the hash functions
+seed = 1
+# Number of processes that calculate the fingerprints (1 calculates them
+# serially). The documents are read in chunks of chunk_size and each process
+# has up to pending_chunks of them waiting, so the memory does not grow with
+# the size of the file. The "minhash" fingerprints are always serial
+processes = os.cpu_count() or 1
+chunk_size = 256
+pending_chunks = 2
+
+def string_to_bag_of_words(text):
+    """
+    Given a list of texts returns a dictionary with the identifier of a text/
+    query and the set of its terms with their frequency
+    """
+    global stop_words
+    bow = {}
+
+    for line in text:
+        blob = TextBlob(text.get(line))
+        tokens = blob.words
+        aux = {}
+        for token in tokens:
+            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
+            token = token.stem()
+            # Check that the token is not an empty word
+            if token not in stop_words:
+                if aux.get(token) == None:
+                    aux[token] = 1
+                else:
+                    aux[token] += 1
+        bow[line] = aux
+
+    return bow
+
+def string_to_trigrams(text):
+    """
+    Given a text returns a list with its trigrams
+    """
+    bot = {}
+    for line in text:
+        list_of_trigram = []
+        # Divide the text of each line into words and convert them to lowercase.
+        clean_line = text.get(line).lower().strip("\n").split(" ")
+        # For each word in the line, create a list of trigrams
+        for i in range(0, len(clean_line) - 3):
+            trigram = clean_line[i] + clean_line[i + 1] + clean_line[i + 2]
+            list_of_trigram.append(trigram)
+        bot[line] = list_of_trigram
+  
+    return bot    
+
+def load_stop_words(filename):
+    """
+    Loads a list of stop words from a .txt file. To be used auxiliary in the
+    string_to_bag_of_words function
+    """
+    global stop_words
+
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.strip("\n ")
+            stop_words.add(line)
+
+def load_lines(filename):
+    """
+    Given a .txt file returns a list with the contents of each of its lines
+    """
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        lines = [line.rstrip() for line in lines]
+
+    d = {}
+    for line in lines:
+        separator = line.split(' ')
+        result = ''
+        for i in range(1, len(separator)):
+            result += separator[i] + " "
+        d[separator[0]] = result
+    return d
+
+def read_documents(filename):
+    """
+    Reads the documents of a .txt file one at a time, as load_lines
+    """
+    with open(filename, 'r') as file:
+        for line in file:
+            separator = line.rstrip().split(' ')
+            yield separator[0], "".join(word + " " for word in separator[1:])
+
+def document_terms(texts):
+    """
+    Given a dictionary with texts, returns their terms with the selected
+    processing
+    """
+    if processing == "trigram":
+        return string_to_trigrams(texts)
+    elif processing == "tokenization":
+        return string_to_bag_of_words(texts)
+    else:
+        raise Exception("Invalid processing")
+
+def split_item_to_set(item):
+    """
+    Given the terms in a dictionary adds them to a set
+    """
+    result = set()
+    for word in item:
+        result.add(word)
+
+    return result
+
+def sim_hash(item, restrictiveness, processing):
+    """
+    Given a set, a restrictiveness and how to process the text, calculates its
+    hash and returns it
+    """
+    if processing == "trigram":
+        return sim_hash_trigram(item, restrictiveness)
+    elif processing == "tokenization":
+        return sim_hash_tokenization(item, restrictiveness)
+    else:
+        raise Exception("Invalid processing")
+    
+def sim_hash_trigram(item, restrictiveness):
+    """
+    Calculates the hash using the trigrams of a text
+    """
+    queue = PriorityQueue()
+    for trigram in item:
+        queue.put(hashlib.sha224(trigram.encode("utf-8")).hexdigest())
+        simhash = 0
+    for x in range(0, restrictiveness):
+        simhash ^= int(queue.get(), base = 16)
+    return simhash
+
+def sim_hash_tokenization(item, restrictiveness):
+    """
+    Calculates the hash using the tokens of a text
+    """
+    result = split_item_to_set(item)
+    queue = PriorityQueue()
+    for x in result:
+        queue.put(hashlib.sha224(x.encode("utf-8")).hexdigest())
+        simhash = 0
+    for x in range(0, restrictiveness):
+        simhash ^= int(queue.get(), base = 16)
+    return simhash
+
+def sim_hash_compat(item, restrictiveness, processing):
+    """
+    Calculates the same hash as sim_hash. The SHA-224 digests are compared as
+    bytes, which sort as their hex strings, and only the restrictiveness lowest
+    ones are kept. A text with fewer terms gets the XOR of all of them
+    """
+    if processing == "tokenization":
+        item = split_item_to_set(item)
+    elif processing != "trigram":
+        raise Exception("Invalid processing")
+    digests = [hashlib.sha224(x.encode("utf-8")).digest() for x in item]
+    simhash = 0
+    for digest in heapq.nsmallest(restrictiveness, digests):
+        simhash ^= int.from_bytes(digest, "big")
+    return simhash
+
+# Parameters of the 64-bit FNV-1a hash
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+def fnv1a(terms):
+    """
+    Returns an array with a 64-bit hash of each term. FNV-1a is applied to all
+    the terms at once, one character position at a time, and its bits are
+    mixed so the lowest hashes do not depend on the first characters only
+    """
+    data = np.array(terms, dtype=str)
+    result = np.full(len(data), FNV_OFFSET, dtype=np.uint64)
+    width = data.itemsize // 4
+    if len(data) == 0 or width == 0:
+        return mix(result)
+    # Longest terms first, so the terms with a character at each position are
+    # the first ones
+    lengths = np.char.str_len(data)
+    order = np.argsort(-lengths, kind="stable")
+    active = np.searchsorted(-lengths[order], -np.arange(width), "left")
+    # Code point of each character, a row by position
+    columns = data[order].view(np.uint32).reshape(len(data), width).T.astype(np.uint64)
+    for i in range(width):
+        count = active[i]
+        result[:count] = (result[:count] ^ columns[i, :count]) * np.uint64(FNV_PRIME)
+    hashes = np.empty_like(result)
+    hashes[order] = result
+    return mix(hashes)
+
+def bottom_k_hashes(items, restrictiveness):
+    """
+    Given the terms of a batch of texts, returns the fingerprint of each one:
+    the XOR of the restrictiveness lowest 64-bit hashes of its different terms,
+    selected with a partial sort
+    """
+    terms = []
+    offsets = [0]           # Position of the first term of each text
+    for item in items:
+        terms.extend(set(item))
+        offsets.append(len(terms))
+    hashes = np.concatenate([fnv1a(terms[i:i + batch_size])
+        for i in range(0, len(terms), batch_size)] or [np.zeros(0, np.uint64)])
+
+    result = []
+    for i in range(len(items)):
+        values = hashes[offsets[i]:offsets[i + 1]]
+        if len(values) > restrictiveness:
+            values = np.partition(values, restrictiveness - 1)[0:restrictiveness]
+        result.append(int(np.bitwise_xor.reduce(values)) if len(values) > 0 else 0)
+    return result
+
+def minimum_hashes(terms):
+    """
+    Returns a dictionary with the "minimum" fingerprint of each text, calculated
+    with the selected engine
+    """
+    if engine == "vectorized":
+        return dict(zip(terms, bottom_k_hashes([terms.get(item) for item in terms],
+            restrictiveness)))
+    elif engine == "compat":
+        return {item: sim_hash_compat(terms.get(item), restrictiveness, processing)
+            for item in terms}
+    elif engine == "queue":
+        return {item: sim_hash(terms.get(item), restrictiveness, processing)
+            for item in terms}
+    else:
+        raise Exception("Invalid engine")
+
+def feature_hash(feature):
+    """
+    Returns the 64-bit hash of a term or trigram
+    """
+    return int(hashlib.sha224(feature.encode("utf-8")).hexdigest()[0:16], base = 16)
+
+def charikar_hash(item):
+    """
+    Calculates the simhash of a text as proposed by Charikar. Each term adds its
+    weight (its frequency) to the bits that are 1 in its hash and subtracts it
+    from the bits that are 0, and the fingerprint has a 1 in the bits with a
+    positive sum. Similar texts get fingerprints that differ in few bits
+    """
+    weights = {}
+    if isinstance(item, dict):
+        weights = item
+    else:
+        for feature in item:
+            weights[feature] = weights.get(feature, 0) + 1
+    if len(weights) == 0:
+        return 0
+
+    hashes = np.array([feature_hash(feature) for feature in weights], dtype=">u8")
+    # Bits of each hash, from the highest to the lowest
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(len(hashes), 64)
+    sums = np.array(list(weights.values()), dtype=np.float64) @ (2.0 * bits - 1)
+    simhash = 0
+    for bit in sums > 0:
+        simhash = (simhash << 1) | int(bit)
+    return simhash
+
+def popcount(values):
+    """
+    Returns the number of bits that are 1 in each value of an array of 64-bit
+    integers
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return np.unpackbits(values.view(np.uint8)).reshape(len(values), 64).sum(axis=1)
+
+class Permuted_Tables:
+    """
+    Index of 64-bit fingerprints to find those within a Hamming distance, as
+    proposed by Manku et al. The fingerprints are split in blocks. Two of them
+    that differ in up to distance bits differ in up to distance blocks, so the
+    rest of their blocks are equal. Each table sorts the fingerprints by one
+    choice of blocks - distance blocks, as if they were permuted to the highest
+    bits, and only those with the same key are compared
+    """
+    def __init__(self, fingerprints, distance, blocks):
+        if blocks <= distance:
+            raise Exception("There must be more blocks than the distance")
+        self.fingerprints = np.array(fingerprints, dtype=np.uint64)
+        self.distance = distance
+        # First bit and size of each block
+        self.blocks = [(i * 64 // blocks, (i + 1) * 64 // blocks - i * 64 // blocks)
+            for i in range(blocks)]
+        self.tables = []        # Chosen blocks, sorted keys and fingerprint ids
+        for chosen in combinations(range(blocks), blocks - distance):
+            keys = self.key(self.fingerprints, chosen)
+            order = np.argsort(keys, kind="stable")
+            # The ids take 4 bytes, enough for billions of fingerprints
+            self.tables.append((chosen, keys[order], order.astype(np.uint32)))
+
+    def key(self, fingerprints, chosen):
+        """
+        Returns the bits of the chosen blocks of the fingerprints, together
+        """
+        keys = np.zeros(len(fingerprints), dtype=np.uint64)
+        for block in chosen:
+            start, size = self.blocks[block]
+            keys = (keys << np.uint64(size)) | \
+                ((fingerprints >> np.uint64(start)) & np.uint64((1 << size) - 1))
+        return keys
+
+    def search(self, fingerprint):
+        """
+        Returns the ids of the fingerprints within the distance of a fingerprint,
+        in order
+        """
+        query = np.array([fingerprint], dtype=np.uint64)
+        result = set()
+        for chosen, keys, ids in self.tables:
+            key = self.key(query, chosen)
+            start = np.searchsorted(keys, key, "left")[0]
+            end = np.searchsorted(keys, key, "right")[0]
+            candidates = ids[start:end]
+            close = popcount(self.fingerprints[candidates] ^ query[0]) <= self.distance
+            result.update(candidates[close].tolist())
+        return sorted(result)
+
+    def pairs(self):
+        """
+        Returns every pair of ids (lowest first) of fingerprints within the
+        distance, in order. Only the fingerprints with the same key in a table
+        are compared
+        """
+        result = set()
+        for chosen, keys, ids in self.tables:
+            # Runs of equal keys
+            bounds = np.flatnonzero(np.diff(keys)) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(keys)]))
+            for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                run = ids[start:end]
+                first, second = np.triu_indices(len(run), 1)
+                different = popcount(self.fingerprints[run[first]] ^
+                    self.fingerprints[run[second]])
+                for i, j in zip(run[first][different <= self.distance].tolist(),
+                        run[second][different <= self.distance].tolist()):
+                    result.add((min(i, j), max(i, j)))
+        return sorted(result)
+
+def mix(values):
+    """
+    Scrambles the bits of an array of 64-bit integers (splitmix64 finalizer)
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+class MinHash:
+    """
+    Calculates MinHash signatures of sets of terms. The fraction of equal
+    values of two signatures estimates the Jaccard value of the sets
+    """
+    def __init__(self, size, scheme, seed):
+        generator = np.random.default_rng(seed)
+        self.size = size
+        self.scheme = scheme
+        self.seeds = generator.integers(0, 2**64, size=size, dtype=np.uint64)
+
+    def signature(self, terms):
+        """
+        Returns the signature of a set of terms. The empty set gets the highest
+        value in every position
+        """
+        empty = np.iinfo(np.uint64).max
+        if len(terms) == 0:
+            return np.full(self.size, empty, dtype=np.uint64)
+        hashes = np.array([feature_hash(term) for term in terms], dtype=np.uint64)
+        if self.scheme == "k_permutation":
+            # A hash function for each value, the hash mixed with its seed
+            return mix(hashes[None, :] ^ self.seeds[:, None]).min(axis=1)
+        elif self.scheme != "one_permutation":
+            raise Exception("Invalid MinHash scheme")
+
+        # A single hash function splits the terms in bins
+        hashes = mix(hashes ^ self.seeds[0])
+        result = np.full(self.size, empty, dtype=np.uint64)
+        np.minimum.at(result, (hashes % np.uint64(self.size)).astype(np.int64),
+            hashes // np.uint64(self.size))
+        # Each empty bin takes the value of the next bin that is not empty
+        # (rotation), shifted by the distance so they are not confused
+        filled = np.flatnonzero(result != empty)
+        following = filled[np.searchsorted(filled, np.arange(self.size)) % len(filled)]
+        distance = (following - np.arange(self.size)) % self.size
+        offset = np.uint64(empty // np.uint64(self.size) + 1)
+        return result[following] + distance.astype(np.uint64) * offset
+
+class MinHash_LSH:
+    """
+    LSH index of MinHash signatures. The signatures are split in bands of
+    rows_per_band values and two texts are candidates when they have the same
+    values in any band. With b bands of r values the probability is
+    1 - (1 - J^r)^b for a Jaccard value J
+    """
+    def __init__(self, signatures, rows):
+        if signatures.shape[1] % rows != 0:
+            raise Exception("The rows per band must divide the signature size")
+        self.signatures = signatures
+        self.tables = []        # Texts of each key by band
+        for start in range(0, signatures.shape[1], rows):
+            table = {}
+            for position, signature in enumerate(signatures):
+                key = signature[start:start + rows].tobytes()
+                if table.get(key) == None:
+                    table[key] = []
+                table[key].append(position)
+            self.tables.append(table)
+
+    def candidates(self):
+        """
+        Returns every pair of positions (lowest first) of texts that share a
+        band, in order
+        """
+        result = set()
+        for table in self.tables:
+            for positions in table.values():
+                for i, j in combinations(positions, 2):
+                    result.add((i, j))
+        return sorted(result)
+
+    def estimate(self, i, j):
+        """
+        Returns the Jaccard value of two texts estimated from their signatures
+        """
+        return float((self.signatures[i] == self.signatures[j]).mean())
+
+def jaccard(first, second):
+    """
+    Returns the Jaccard value of two sets
+    """
+    if len(first) == 0 and len(second) == 0:
+        return 1.0
+    intersection = len(first.intersection(second))
+    return intersection / (len(first) + len(second) - intersection)
+
+def pair_names(names, pairs):
+    """
+    Given the positions of pairs of texts returns them as "first second", the
+    lowest number first, as in the file "articles_2500.truth"
+    """
+    result = []
+    for i, j in pairs:
+        if int(names[i][1:]) < int(names[j][1:]):
+            result.append(names[i] + " " + names[j])
+        else:
+            result.append(names[j] + " " + names[i])
+    return result
+
+def fingerprints(terms):
+    """
+    Returns a dictionary with the fingerprint of each text, "charikar" or
+    "minimum"
+    """
+    if fingerprint == "charikar":
+        return {name: charikar_hash(terms.get(name)) for name in terms}
+    elif fingerprint == "minimum":
+        return minimum_hashes(terms)
+    else:
+        raise Exception("Invalid fingerprint")
+
+def near_duplicates(hashes):
+    """
+    Given the Charikar fingerprint of each text, returns the pairs of
+    near-duplicate texts using the permuted tables
+    """
+    names = list(hashes)
+    tables = Permuted_Tables(list(hashes.values()), hamming_distance, blocks)
+    return pair_names(names, tables.pairs())
+
+def equal_duplicates(hashes):
+    """
+    Given the "minimum" fingerprint of each text, returns the groups of texts
+    with the same fingerprint
+    """
+    # Dictionary in which we store duplicate texts
+    repeated = {}
+    compare_results = []
+    for item in hashes:
+        actual_hash = hashes[item]
+        # If the hash does not exist, a new entry is created with the current text
+        if (repeated.get(actual_hash) == None):
+            repeated[actual_hash] = item
+        # If the hash exists, the entry is modified by adding the index of the
+        # new text
+        else:
+            earlier = repeated[actual_hash]
+            repeated[actual_hash] = str(earlier) + " " + str(item)
+
+    # We go through the dictionary
+    for key in repeated:
+        result = repeated.get(key).split(" ")
+        # If an entry has more than one result, it means that there are repeated
+        # texts.
+        if len(result) > 1:
+            compare_results.append(repeated.get(key))
+    return compare_results
+
+def settings_of_process():
+    """
+    Returns the settings that a process needs to calculate fingerprints
+    """
+    return {"stop_words": stop_words, "processing": processing,
+        "fingerprint": fingerprint, "restrictiveness": restrictiveness,
+        "engine": engine, "batch_size": batch_size}
+
+def configure(settings):
+    """
+    Applies the settings of settings_of_process in a new process
+    """
+    global stop_words, processing, fingerprint, restrictiveness, engine, batch_size
+    stop_words = settings["stop_words"]
+    processing = settings["processing"]
+    fingerprint = settings["fingerprint"]
+    restrictiveness = settings["restrictiveness"]
+    engine = settings["engine"]
+    batch_size = settings["batch_size"]
+
+def fingerprint_chunk(chunk):
+    """
+    Given a list of documents (name, text), returns their names and
+    fingerprints in the same order
+    """
+    return list(fingerprints(document_terms(dict(chunk))).items())
+
+def parallel_fingerprints(filename, processes):
+    """
+    Returns a dictionary with the fingerprint of each document of a .txt file,
+    as fingerprints(document_terms(load_lines(filename))). The documents are
+    read in chunks and each chunk is given to a process of a pool. Only
+    processes * pending_chunks chunks are read ahead, and their fingerprints
+    are merged in the order of the file
+    """
+    hashes = {}
+    pending = deque()
+    documents = read_documents(filename)
+    with Pool(processes, initializer=configure,
+            initargs=(settings_of_process(),)) as pool:
+        while True:
+            chunk = list(islice(documents, chunk_size))
+            if len(chunk) > 0:
+                pending.append(pool.apply_async(fingerprint_chunk, (chunk,)))
+            if len(pending) > 0 and (len(chunk) == 0 or
+                    len(pending) >= processes * pending_chunks):
+                for name, value in pending.popleft().get():
+                    hashes[name] = value
+            if len(chunk) == 0 and len(pending) == 0:
+                break
+    return hashes
+
+def minhash_duplicates(terms):
+    """
+    Returns the pairs of near-duplicate texts using the MinHash signatures of
+    their sets of terms and the LSH index. The candidate pairs are checked as
+    set in verification
+    """
+    names = list(terms)
+    sets = [split_item_to_set(terms.get(name)) for name in names]
+    minhash = MinHash(signature_size, minhash_scheme, seed)
+    signatures = np.array([minhash.signature(item) for item in sets],
+        dtype=np.uint64).reshape(len(sets), signature_size)
+    index = MinHash_LSH(signatures, rows_per_band)
+
+    pairs = []
+    for i, j in index.candidates():
+        if verification == "exact":
+            value = jaccard(sets[i], sets[j])
+        elif verification == "estimate":
+            value = index.estimate(i, j)
+        elif verification == "none":
+            value = 1
+        else:
+            raise Exception("Invalid verification")
+        if value >= jaccard_threshold:
+            pairs.append((i, j))
+    return pair_names(names, pairs)
+
+def check_results(compare_results):
+    """
+    Check the results I get with those expected in the file "articles_2500.truth"
+    """
+    global expected_duplicates
+    global processing
+    long = len(expected_duplicates)
+
+    good_counter = 0
+    bad_counter = 0
+    for result in compare_results:
+        if result in expected_duplicates:
+            good_counter += 1
+        else:
+            bad_counter += 1
+    print("{0:.2f}".format(good_counter  / long * 100) + "% effectiveness using", 
+        processing, settings())
+    print("\t-", bad_counter, "more duplicates found than expected")
+    print("\t-", long - good_counter, "less duplicates found than expected")
+
+def settings():
+    """
+    Describes the fingerprint used to find the duplicates
+    """
+    if fingerprint == "charikar":
+        return "with a Hamming distance of " + str(hamming_distance)
+    elif fingerprint == "minimum" and engine == "vectorized":
+        return "with a restrictiveness of " + str(restrictiveness) + " (64-bit hashes)"
+    elif fingerprint == "minhash":
+        return "with {0} MinHash of {1} values, {2} rows per band and {3} " \
+            "verification".format(minhash_scheme, signature_size, rows_per_band,
+            verification)
+    return "with a restrictiveness of " + str(restrictiveness)
+
+def load_results(filename):
+    """
+    Stores the expected results of the file "articles_2500.truth"
+    """
+    result = []
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.strip()
+            line = line.split(" ")
+            first = line[0]
+            second = line[1]
+            first_n = int(first[1:])
+            second_n = int(second[1:])
+            if (first_n < second_n):
+                result.append(first + " " + second)
+            else:
+                result.append(second + " " + first)
+    return result
+
+def save_results(results):
+    """
+    Saves the results in a file
+    """
+    with open("results.txt", 'w') as file:
+        file.write("Duplicates found using " +
+        processing + " " + settings() + "\n")
+        for result in results:
+            file.write(result + "\n")
+
+def main():
+    """
+    Find quasi-duplicate documents
+    """
+    global expected_duplicates
+    global restrictiveness
+    global processing
+    # Load the expected duplicates
+    expected_duplicates = load_results("articles_2500.truth")
+
+    # Load the stop words
+    if processing == "tokenization":
+        load_stop_words("stop-words.txt")
+
+    if fingerprint == "minhash":
+        # Get the trigrams or the bag of words of the documents
+        terms = document_terms(load_lines("articles_2500.train"))
+        compare_results = minhash_duplicates(terms)
+    else:
+        if processes > 1:
+            hashes = parallel_fingerprints("articles_2500.train", processes)
+        else:
+            hashes = fingerprints(document_terms(load_lines("articles_2500.train")))
+        if fingerprint == "charikar":
+            compare_results = near_duplicates(hashes)
+        else:
+            compare_results = equal_duplicates(hashes)
+
+    save_results(compare_results)
+    check_results(compare_results)
+
+if __name__ == '__main__':
+    main()
@@ -1,245 +1,619 @@
-#-------------------------------------------------------------------------------
-# Name:        Similarity between texts
-# Purpose:     Use of text similarity to solve information needs (queries)
-#
-# Author:      Sergio Murillo
-#
-# Created:     30/09/2022
-#-------------------------------------------------------------------------------
-
-from textblob import TextBlob
-import math
-
-# Auxiliary list for stop words
-stop_words = set()
-
-class Check_results:
-    """
-    Data structure in which to store the data of the "cranqrel" file
-    """
-    def __init__(self, index, text, value):
-        self.index = index
-        self.text = text
-        self.value = value
-
-def find_best_text(query, texts, coefficient):
-    """
-    Returns the best text and its value for a query and a coefficient passed by
-    parameter
-    """
-    if coefficient == "jaccard":
-        return jaccard(query, texts)
-    elif coefficient == "cosine":
-        return cosine(query, texts)
-    else:
-        raise ModuleNotFoundError
-
-def cosine(query, texts):
-    """
-    Cosine coefficient
-    """
-    best_option = -1
-    similar_text = None
-    for text in texts:
-        len1 = len(texts.get(text))
-        len2 = len(query)
-        temp = interseccion(texts.get(text),query) / math.sqrt(len1 * len2)
-        if temp > best_option:
-            best_option = temp
-            similar_text = text
-    return best_option, similar_text
-
-def jaccard(query, texts):
-    """
-    Jaccard coefficient
-    """
-    best_option = -1
-    similar_text = None
-    for text in texts:
-        temp = interseccion(texts.get(text),query) / union(texts.get(text),query)
-        if temp > best_option:
-            best_option = temp
-            similar_text = text
-    return best_option, similar_text
-
-def union(text1, text2):
-    """
-    Auxiliary method to make the union on two lists
-    """
-    result = set()
-    for text in text1:
-        result.add(text)
-    for text in text2:
-        result.add(text)
-    return len(result)
-
-def interseccion(text1, text2):
-    """
-    Auxiliary method to perform the intersection over two lists
-    """
-    count = 0
-    if len(text1) > len(text2):
-        for text in text2:
-            if text in text1:
-                count += 1
-    else :
-        for text in text2:
-            if text in text1:
-                count += 1
-    return count
-
-def string_to_bag_of_words(text):
-    """
-    Given a list of texts returns a dictionary with the identifier of a text/
-    query and the set of its terms with their frequency
-    """
-    global stop_words
-    bow = {}
-
-    for line in text:
-        blob = TextBlob(text.get(line))
-        tokens = blob.words
-        aux = {}
-        for token in tokens:
-            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
-            token = token.stem()
-            # Check that the token is not an empty word
-            if token not in stop_words:
-                if aux.get(token) == None:
-                    aux[token] = 1
-                else:
-                    aux[token] += 1
-        bow[line] = aux
-
-    return bow
-
-def load_lines(filename):
-    """
-    Given a .txt file returns a list with the contents of each of its lines
-    """
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        lines = [line.rstrip() for line in lines]
-
-    d = {}
-    for line in lines:
-        separator = line.split('\t')
-        d[separator[0]] = separator[1]
-
-    return d
-
-def load_stop_words(filename):
-    """
-    Loads a list of stop words from a .txt file. To be used auxiliary in the
-    string_to_bag_of_words function
-    """
-    global stop_words
-
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            line = line.strip("\n ")
-            stop_words.add(line)
-
-def load_relevancy_scale(filename):
-    """
-    Load the "cranqrel" file. Helps to evaluate the results obtained
-    """
-    result = []
-
-    with open(filename, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            line = line.split(" ")
-            one_relevancy = Check_results(line[0], line[1], line[2])
-            result.append(one_relevancy)
-
-    return result
-
-def print_relevancy(size, total_size, coefficient):
-    """
-    Prints the results obtained with respect to the file "cranqrel"
-    """
-    prob = size / (total_size -1) * 100
-    print("{0:.2f}".format(prob) + "% of the queries have a solution with a" +
-        " relevance higher than 5.", size, "/", total_size-1, "documents for " +
-        coefficient + " coefficient.")
-
-def main():
-    """
-    Finds the most similar text for a set of queries
-    """
-    # Load the texts and queries
-    texts = load_lines("cran-1400.txt")
-    queries = load_lines("cran-queries.txt")
-
-    # Load the stop words
-    load_stop_words("stop-words.txt")
-
-    # Load the cranqrel list to evaluate the results obtained later on.
-    list_relevancy = load_relevancy_scale("cranqrel")
-
-    # Get the bag of words of the texts and queries
-    bow_texts = string_to_bag_of_words(texts)
-    bow_queries = string_to_bag_of_words(queries)
-
-    # Auxiliary variables for accessing dictionary positions and evaluating
-    # results.
-    counter = 1
-    counter_cosine = 0
-    counter_jaccard = 0
-
-    # .txt where it saved the results with similarity and text obtained for each
-    # query
-    save_results = open("results.txt", "w")
-
-    for q in bow_queries:
-        text_result = "Query: " + q + " - " + queries.get(q) + "\n"
-        save_results.write(text_result)
-
-        # Query with cosine
-        result = find_best_text(bow_queries.get(q), bow_texts, "cosine")
-        text_result = "\t[COSINE] Similarity: " + str(result[0]) + "\n"
-        text_result += "\t" + texts.get(result[1]) + "\n"
-        save_results.write(text_result)
-
-        best_value = 5
-        for relevancy in list_relevancy:
-            if int(relevancy.index) == counter:
-                index = (str(result[1]))[1::]
-                if (int(index)) == int(relevancy.text):
-                    if int(relevancy.value) < best_value:
-                        best_value = int(relevancy.value)
-
-        if(best_value != 5):
-            print("[COSINE] Query", q, "appears in similarity with", relevancy.text,
-                "with a relevance of", best_value)
-            counter_cosine += 1
-
-        # Query with Jaccard
-        result = find_best_text(bow_queries.get(q), bow_texts, "jaccard")
-        text_result = "\t[JACCARD] Similarity: " + str(result[0]) + "\n"
-        text_result += "\t" + texts.get(result[1]) + "\n"
-        save_results.write(text_result)
-
-        best_value = 5
-        for relevancy in list_relevancy:
-            if int(relevancy.index) == counter:
-                index = (str(result[1]))[1::]
-                if (int(index)) == int(relevancy.text):
-                    if int(relevancy.value) < best_value:
-                        best_value = int(relevancy.value)
-
-        if(best_value != 5):
-            print("[JACCARD] Query", q, "appears in similarity with", relevancy.text,
-                "with a relevance of", best_value)
-            counter_jaccard += 1
-
-        counter += 1
-
-    # Print the results of relevancy
-    print_relevancy(counter_cosine, counter, "cosine")
-    print_relevancy(counter_jaccard, counter, "jaccard")
-
-if __name__ == '__main__':
-    main()
+#-------------------------------------------------------------------------------
+# Name:        Similarity between texts
+# Purpose:     Use of text similarity to solve information needs (queries)
+#
+# Author:      Sergio Murillo
+#
+# Created:     30/09/2022
+#-------------------------------------------------------------------------------
+
+from textblob import TextBlob
+import hashlib
+import math
+import numpy as np
+import scipy.sparse as sp
+
+# Auxiliary list for stop words
+stop_words = set()
+# Search of the best text:
+#   - Use "matrix" to obtain the values of every query and text at once with
+#     sparse matrices
+#   - Use "inverted_index" to visit only the texts that share terms with the
+#     query
+#   - Use "scan" to compare the query with every text
+#   - Use "lsh" to compare the query only with the texts whose MinHash
+#     signature shares a band with its own (approximate Jaccard search)
+backend = "matrix"
+# MinHash signatures: number of hash functions (permutations), number of bands
+# of the LSH index (it must divide the permutations) and seed of the functions.
+# The Jaccard values of the Cranfield queries are low (most under 0.1), so the
+# bands have 2 values: with 1 a single equal value makes a text a candidate and
+# with 3 or more almost no text is. Many bands keep the recall of 1 value per
+# band with half the candidates. The recall at each setting is printed by main
+permutations = 1024
+bands = 512
+seed = 1
+# Minimum estimated Jaccard value of a candidate of the LSH index
+lsh_threshold = 0.05
+# Rank the candidates by their exact value (True) or by the value estimated
+# from the signatures (False)
+rerank = True
+
+class Check_results:
+    """
+    Data structure in which to store the data of the "cranqrel" file
+    """
+    def __init__(self, index, text, value):
+        self.index = index
+        self.text = text
+        self.value = value
+
+def find_best_text(query, texts, coefficient):
+    """
+    Returns the best text and its value for a query and a coefficient passed by
+    parameter
+    """
+    if coefficient == "jaccard":
+        return jaccard(query, texts)
+    elif coefficient == "cosine":
+        return cosine(query, texts)
+    else:
+        raise ModuleNotFoundError
+
+class Inverted_Index:
+    """
+    Data structure in which to store the texts that contain each term and the
+    number of different terms of each text
+    """
+    def __init__(self, texts):
+        self.names = list(texts)    # Identifier of each text by position
+        self.sizes = []             # Number of different terms of each text
+        self.postings = {}          # Positions of the texts of each term
+        for position, name in enumerate(self.names):
+            self.sizes.append(len(texts.get(name)))
+            for term in texts.get(name):
+                if self.postings.get(term) == None:
+                    self.postings[term] = []
+                self.postings[term].append(position)
+
+    def intersections(self, query):
+        """
+        Returns the number of terms that each text shares with the query, only
+        for the texts that share any
+        """
+        counts = {}
+        for term in query:
+            for position in self.postings.get(term, []):
+                counts[position] = counts.get(position, 0) + 1
+        return counts
+
+def find_best_text_indexed(query, index, coefficient):
+    """
+    Returns the best text and its value for a query and a coefficient passed by
+    parameter, visiting only the postings of the terms of the query. The result
+    is the same as with find_best_text
+    """
+    best_option = -1
+    similar_text = None
+    counts = index.intersections(query)
+    for position in sorted(counts):
+        size = index.sizes[position]
+        if coefficient == "jaccard":
+            temp = counts[position] / (size + len(query) - counts[position])
+        elif coefficient == "cosine":
+            temp = counts[position] / math.sqrt(size * len(query))
+        else:
+            raise ModuleNotFoundError
+        if temp > best_option:
+            best_option = temp
+            similar_text = index.names[position]
+
+    # Texts that do not share terms have value 0, the first one is returned
+    if best_option <= 0 and len(index.names) > 0:
+        return 0.0, index.names[0]
+    return best_option, similar_text
+
+class Similarity_Matrices:
+    """
+    Data structure in which to store the number of terms that every query
+    shares with every text, obtained with a product of sparse binary matrices
+    """
+    def __init__(self, queries, texts):
+        self.queries = list(queries)    # Identifier of each query by row
+        self.names = list(texts)        # Identifier of each text by column
+        vocabulary = {}
+        for bow in (texts, queries):
+            for name in bow:
+                for term in bow.get(name):
+                    if vocabulary.get(term) == None:
+                        vocabulary[term] = len(vocabulary)
+        query_matrix = incidence_matrix(queries, vocabulary)
+        text_matrix = incidence_matrix(texts, vocabulary)
+        # Number of different terms of each query and text
+        self.query_sizes = np.asarray(query_matrix.sum(axis=1)).ravel()
+        self.text_sizes = np.asarray(text_matrix.sum(axis=1)).ravel()
+        self.intersections = (query_matrix @ text_matrix.T).toarray()
+
+    def matrix(self, coefficient):
+        """
+        Returns the matrix with the value of the coefficient for every query
+        (row) and text (column)
+        """
+        if coefficient == "jaccard":
+            unions = self.query_sizes[:, None] + self.text_sizes[None, :] - \
+                self.intersections
+            return self.intersections / unions
+        elif coefficient == "cosine":
+            return self.intersections / np.sqrt(np.outer(self.query_sizes,
+                self.text_sizes))
+        else:
+            raise ModuleNotFoundError
+
+    def best(self, coefficient):
+        """
+        Returns a dictionary with the best text and its value for each query.
+        On ties the first text is chosen, as in find_best_text
+        """
+        values = self.matrix(coefficient)
+        columns = np.argmax(values, axis=1)
+        result = {}
+        for row, column in enumerate(columns):
+            result[self.queries[row]] = (float(values[row, column]),
+                self.names[column])
+        return result
+
+    def top_k(self, coefficient, k):
+        """
+        Returns a dictionary with the k best texts and their values for each
+        query, sorted by value
+        """
+        values = self.matrix(coefficient)
+        columns = np.argsort(-values, axis=1, kind="stable")[:, 0:k]
+        result = {}
+        for row in range(len(self.queries)):
+            result[self.queries[row]] = [(float(values[row, column]),
+                self.names[column]) for column in columns[row]]
+        return result
+
+def term_hash(term):
+    """
+    Returns a 64-bit hash of a term that is the same in every run
+    """
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"),
+        digest_size=8).digest(), "little")
+
+def mix(values):
+    """
+    Scrambles the bits of an array of 64-bit integers (splitmix64 finalizer)
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+class MinHash:
+    """
+    Generates MinHash signatures of sets of terms. Each of the permutations is
+    simulated with a hash function, the hash of the term mixed with its own
+    seed, and the signature keeps the lowest value of each one. The fraction
+    of equal values of two signatures estimates the Jaccard value of the sets
+    """
+    def __init__(self, permutations, seed):
+        generator = np.random.default_rng(seed)
+        self.seeds = generator.integers(0, 2**64, size=permutations,
+            dtype=np.uint64)
+        self.hashes = {}        # Hash of each term already seen
+
+    def signature(self, terms):
+        """
+        Returns the signature of a set of terms. The empty set gets the highest
+        value in every position
+        """
+        if len(terms) == 0:
+            return np.full(len(self.seeds), np.iinfo(np.uint64).max, dtype=np.uint64)
+        values = []
+        for term in terms:
+            if self.hashes.get(term) == None:
+                self.hashes[term] = term_hash(term)
+            values.append(self.hashes[term])
+        values = np.array(values, dtype=np.uint64)
+        return mix(values[None, :] ^ self.seeds[:, None]).min(axis=1)
+
+class MinHash_LSH:
+    """
+    LSH index of the MinHash signatures of the texts. The signature is split
+    in bands and each band is a key of its own table, so two texts are
+    candidates when they have the same values in any band. With b bands of r
+    values the probability is 1 - (1 - J^r)^b for a Jaccard value J
+    """
+    def __init__(self, texts, permutations, bands, seed):
+        if permutations % bands != 0:
+            raise ValueError("The bands must divide the permutations")
+        self.rows = permutations // bands
+        self.minhash = MinHash(permutations, seed)
+        self.names = list(texts)                # Identifier of each text by position
+        self.terms = [set(texts.get(name)) for name in self.names]
+        self.signatures = np.array([self.minhash.signature(terms)
+            for terms in self.terms]).reshape(len(self.names), permutations)
+        self.tables = [{} for band in range(bands)]    # Texts of each key by band
+        for position, signature in enumerate(self.signatures):
+            for band, key in enumerate(self.keys(signature)):
+                if self.tables[band].get(key) == None:
+                    self.tables[band][key] = []
+                self.tables[band][key].append(position)
+
+    def keys(self, signature):
+        """
+        Returns the key of each band of a signature
+        """
+        return [signature[i:i + self.rows].tobytes()
+            for i in range(0, len(signature), self.rows)]
+
+    def candidates(self, query, threshold=0):
+        """
+        Given the terms of a query returns the positions of the texts that
+        share a band with it and whose estimated Jaccard value is not lower
+        than threshold, in order, and the estimated values
+        """
+        signature = self.minhash.signature(query)
+        positions = set()
+        for band, key in enumerate(self.keys(signature)):
+            positions.update(self.tables[band].get(key, []))
+        positions = np.array(sorted(positions), dtype=np.int64)
+        if len(positions) == 0:
+            return positions, np.zeros(0)
+        estimates = (self.signatures[positions] == signature).mean(axis=1)
+        selected = estimates >= threshold
+        return positions[selected], estimates[selected]
+
+    def value(self, query, position, estimate, coefficient):
+        """
+        Returns the value of a coefficient between a query and a candidate,
+        exact or derived from the estimated Jaccard value
+        """
+        size = len(self.terms[position])
+        if rerank:
+            intersection = len(self.terms[position].intersection(query))
+        else:
+            # |A n B| = J (|A| + |B|) / (1 + J)
+            intersection = estimate * (size + len(query)) / (1 + estimate)
+        if coefficient == "jaccard":
+            return intersection / (size + len(query) - intersection)
+        elif coefficient == "cosine":
+            return intersection / math.sqrt(size * len(query))
+        else:
+            raise ModuleNotFoundError
+
+    def search(self, query, coefficient, threshold=0):
+        """
+        Returns the best candidate and its value for a query and a coefficient.
+        On ties the first text is chosen, and when there are no candidates the
+        first text is returned with value 0
+        """
+        best_option = 0
+        similar_text = self.names[0] if len(self.names) > 0 else None
+        positions, estimates = self.candidates(query, threshold)
+        for position, estimate in zip(positions, estimates):
+            temp = self.value(query, position, estimate, coefficient)
+            if temp > best_option:
+                best_option = temp
+                similar_text = self.names[position]
+        return float(best_option), similar_text
+
+def lsh_recall(queries, texts, index):
+    """
+    Compares the LSH index with the exact Jaccard values of the Cranfield
+    queries. Returns the fraction of pairs with an exact value not lower than
+    lsh_threshold that are candidates, the fraction of queries whose best text
+    is a candidate and whose result has the exact best value, and the average
+    fraction of the collection that is a candidate
+    """
+    matrices = Similarity_Matrices(queries, texts)
+    exact = matrices.matrix("jaccard")
+    best = matrices.best("jaccard")
+    pairs = found_pairs = found_best = same_value = candidates = 0
+    for row, q in enumerate(matrices.queries):
+        positions = set(index.candidates(queries.get(q), lsh_threshold)[0].tolist())
+        candidates += len(positions)
+        relevant = np.flatnonzero(exact[row] >= lsh_threshold)
+        pairs += len(relevant)
+        found_pairs += len(positions.intersection(relevant.tolist()))
+        if index.names.index(best[q][1]) in positions:
+            found_best += 1
+        if math.isclose(index.search(queries.get(q), "jaccard", lsh_threshold)[0],
+                best[q][0]):
+            same_value += 1
+    return {"pair_recall": found_pairs / pairs if pairs > 0 else 1,
+        "best_recall": found_best / len(queries),
+        "same_value": same_value / len(queries),
+        "candidates": candidates / len(queries) / len(texts)}
+
+def incidence_matrix(bows, vocabulary):
+    """
+    Given the bag of words of several texts returns a sparse binary matrix
+    with a row for each text and a column for each term of the vocabulary
+    """
+    indptr = [0]
+    indices = []
+    for name in bows:
+        indices.extend(vocabulary[term] for term in bows.get(name))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int64)
+    return sp.csr_matrix((data, np.asarray(indices, dtype=np.int64),
+        np.asarray(indptr, dtype=np.int64)), shape=(len(bows), len(vocabulary)))
+
+def best_texts(queries, texts, lsh_index=None):
+    """
+    Returns a dictionary with the best text and its value for each query and
+    each coefficient, found with the selected backend. The "lsh" backend uses
+    lsh_index if it is given
+    """
+    result = {}
+    if backend == "matrix":
+        matrices = Similarity_Matrices(queries, texts)
+        for coefficient in ("cosine", "jaccard"):
+            result[coefficient] = matrices.best(coefficient)
+    elif backend == "inverted_index":
+        inverted_index = Inverted_Index(texts)
+        for coefficient in ("cosine", "jaccard"):
+            result[coefficient] = {}
+            for q in queries:
+                result[coefficient][q] = find_best_text_indexed(queries.get(q),
+                    inverted_index, coefficient)
+    elif backend == "lsh":
+        index = lsh_index
+        if index == None:
+            index = MinHash_LSH(texts, permutations, bands, seed)
+        for coefficient in ("cosine", "jaccard"):
+            result[coefficient] = {}
+            for q in queries:
+                result[coefficient][q] = index.search(queries.get(q),
+                    coefficient, lsh_threshold)
+    elif backend == "scan":
+        for coefficient in ("cosine", "jaccard"):
+            result[coefficient] = {}
+            for q in queries:
+                result[coefficient][q] = find_best_text(queries.get(q), texts,
+                    coefficient)
+    else:
+        raise ModuleNotFoundError
+    return result
+
+def cosine(query, texts):
+    """
+    Cosine coefficient
+    """
+    best_option = -1
+    similar_text = None
+    for text in texts:
+        len1 = len(texts.get(text))
+        len2 = len(query)
+        temp = interseccion(texts.get(text),query) / math.sqrt(len1 * len2)
+        if temp > best_option:
+            best_option = temp
+            similar_text = text
+    return best_option, similar_text
+
+def jaccard(query, texts):
+    """
+    Jaccard coefficient
+    """
+    best_option = -1
+    similar_text = None
+    for text in texts:
+        temp = interseccion(texts.get(text),query) / union(texts.get(text),query)
+        if temp > best_option:
+            best_option = temp
+            similar_text = text
+    return best_option, similar_text
+
+def union(text1, text2):
+    """
+    Auxiliary method to make the union on two lists
+    """
+    result = set()
+    for text in text1:
+        result.add(text)
+    for text in text2:
+        result.add(text)
+    return len(result)
+
+def interseccion(text1, text2):
+    """
+    Auxiliary method to perform the intersection over two lists
+    """
+    count = 0
+    if len(text1) > len(text2):
+        for text in text2:
+            if text in text1:
+                count += 1
+    else :
+        for text in text2:
+            if text in text1:
+                count += 1
+    return count
+
+def string_to_bag_of_words(text):
+    """
+    Given a list of texts returns a dictionary with the identifier of a text/
+    query and the set of its terms with their frequency
+    """
+    global stop_words
+    bow = {}
+
+    for line in text:
+        blob = TextBlob(text.get(line))
+        tokens = blob.words
+        aux = {}
+        for token in tokens:
+            # Apply the stemming to each of the tokens *Default: Porter Stemmer*
+            token = token.stem()
+            # Check that the token is not an empty word
+            if token not in stop_words:
+                if aux.get(token) == None:
+                    aux[token] = 1
+                else:
+                    aux[token] += 1
+        bow[line] = aux
+
+    return bow
+
+def load_lines(filename):
+    """
+    Given a .txt file returns a list with the contents of each of its lines
+    """
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        lines = [line.rstrip() for line in lines]
+
+    d = {}
+    for line in lines:
+        separator = line.split('\t')
+        d[separator[0]] = separator[1]
+
+    return d
+
+def load_stop_words(filename):
+    """
+    Loads a list of stop words from a .txt file. To be used auxiliary in the
+    string_to_bag_of_words function
+    """
+    global stop_words
+
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.strip("\n ")
+            stop_words.add(line)
+
+def load_relevancy_scale(filename):
+    """
+    Load the "cranqrel" file. Helps to evaluate the results obtained
+    """
+    result = []
+
+    with open(filename, 'r') as file:
+        lines = file.readlines()
+        for line in lines:
+            line = line.split(" ")
+            one_relevancy = Check_results(line[0], line[1], line[2])
+            result.append(one_relevancy)
+
+    return result
+
+def print_relevancy(size, total_size, coefficient):
+    """
+    Prints the results obtained with respect to the file "cranqrel"
+    """
+    prob = size / (total_size -1) * 100
+    print("{0:.2f}".format(prob) + "% of the queries have a solution with a" +
+        " relevance higher than 5.", size, "/", total_size-1, "documents for " +
+        coefficient + " coefficient.")
+
+def main():
+    """
+    Finds the most similar text for a set of queries
+    """
+    # Load the texts and queries
+    texts = load_lines("cran-1400.txt")
+    queries = load_lines("cran-queries.txt")
+
+    # Load the stop words
+    load_stop_words("stop-words.txt")
+
+    # Load the cranqrel list to evaluate the results obtained later on.
+    list_relevancy = load_relevancy_scale("cranqrel")
+
+    # Get the bag of words of the texts and queries
+    bow_texts = string_to_bag_of_words(texts)
+    bow_queries = string_to_bag_of_words(queries)
+    lsh_index = None
+    if backend == "lsh":
+        lsh_index = MinHash_LSH(bow_texts, permutations, bands, seed)
+    best = best_texts(bow_queries, bow_texts, lsh_index)
+
+    # Auxiliary variables for accessing dictionary positions and evaluating
+    # results.
+    counter = 1
+    counter_cosine = 0
+    counter_jaccard = 0
+
+    # .txt where it saved the results with similarity and text obtained for each
+    # query
+    save_results = open("results.txt", "w")
+
+    for q in bow_queries:
+        text_result = "Query: " + q + " - " + queries.get(q) + "\n"
+        save_results.write(text_result)
+
+        # Query with cosine
+        result = best["cosine"][q]
+        text_result = "\t[COSINE] Similarity: " + str(result[0]) + "\n"
+        text_result += "\t" + texts.get(result[1]) + "\n"
+        save_results.write(text_result)
+
+        best_value = 5
+        for relevancy in list_relevancy:
+            if int(relevancy.index) == counter:
+                index = (str(result[1]))[1::]
+                if (int(index)) == int(relevancy.text):
+                    if int(relevancy.value) < best_value:
+                        best_value = int(relevancy.value)
+
+        if(best_value != 5):
+            print("[COSINE] Query", q, "appears in similarity with", relevancy.text,
+                "with a relevance of", best_value)
+            counter_cosine += 1
+
+        # Query with Jaccard
+        result = best["jaccard"][q]
+        text_result = "\t[JACCARD] Similarity: " + str(result[0]) + "\n"
+        text_result += "\t" + texts.get(result[1]) + "\n"
+        save_results.write(text_result)
+
+        best_value = 5
+        for relevancy in list_relevancy:
+            if int(relevancy.index) == counter:
+                index = (str(result[1]))[1::]
+                if (int(index)) == int(relevancy.text):
+                    if int(relevancy.value) < best_value:
+                        best_value = int(relevancy.value)
+
+        if(best_value != 5):
+            print("[JACCARD] Query", q, "appears in similarity with", relevancy.text,
+                "with a relevance of", best_value)
+            counter_jaccard += 1
+
+        counter += 1
+
+    # Print the results of relevancy
+    print_relevancy(counter_cosine, counter, "cosine")
+    print_relevancy(counter_jaccard, counter, "jaccard")
+
+    # Print the recall of the approximate search against the exact one. With
+    # the Cranfield collection and a threshold of 0.05 (pairs at or above the
+    # threshold that are candidates, best texts found, texts that are
+    # candidates of each query):
+    #   - 128 permutations, 128 bands: 77% of the pairs, 95% of the best
+    #     texts, 8.4% of the texts
+    #   - 512 permutations, 256 bands: 60% of the pairs, 89% of the best
+    #     texts, 3.7% of the texts
+    #   - 1024 permutations, 512 bands: 79% of the pairs, 96% of the best
+    #     texts, 4.6% of the texts. The signatures take 8 times the memory,
+    #     and with 1398 texts looking up the 512 bands costs more than the
+    #     candidates saved (1.4 ms against 0.75 ms per query)
+    if backend == "lsh":
+        recall = lsh_recall(bow_queries, bow_texts, lsh_index)
+        print("[LSH] {0} permutations, {1} bands, threshold {2}".format(
+            permutations, bands, lsh_threshold))
+        print("[LSH] {0:.2f}% of the pairs with a Jaccard value of at least the"
+            " threshold are candidates".format(recall["pair_recall"] * 100))
+        print("[LSH] {0:.2f}% of the best texts are candidates, {1:.2f}% of the"
+            " results have the exact best value".format(recall["best_recall"] * 100,
+            recall["same_value"] * 100))
+        print("[LSH] {0:.2f}% of the texts are candidates of each query".format(
+            recall["candidates"] * 100))
+
+if __name__ == '__main__':
+    main()